@@ -0,0 +1,37 @@
+from functools import lru_cache
+import hashlib
+import orjson # type: ignore
+from fastapi import Request, Response # type: ignore
+from pydantic import TypeAdapter # type: ignore
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 asks for If-None-Match
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def conditional_response(request: Request, schema, value) -> Response:
+    # Serialises value through the route's schema once and tags it with a
+    # digest of the body. A client sending that ETag back in If-None-Match gets
+    # a bodiless 304, so polling a document's status or reopening a long
+    # transcript doesn't download it again.
+    adapter = _adapter(schema)
+    body = orjson.dumps(adapter.dump_python(adapter.validate_python(value, from_attributes=True)))
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if _matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,9 +1,12 @@
 from fastapi import Depends, HTTPException, status # type: ignore
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials # type: ignore
 from sqlalchemy.orm import Session # type: ignore
+import math
+from app.core.config import settings
 from app.core.database import SessionLocal
 from app.core.security import verify_token
 from app.models.user import User
+from app.services.rate_limiter import get_rate_limiter
 
 security = HTTPBearer()
 
@@ -47,4 +50,22 @@ async def get_active_user(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Inactive user"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+def rate_limit(endpoint: str):
+    # Charges the endpoint's cost to the user's token bucket; once it runs dry
+    # the request is refused with the time until enough tokens have refilled
+    async def check_rate_limit(current_user: User = Depends(get_active_user)):
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        
+        retry_after = await get_rate_limiter().check(current_user.id, endpoint)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+    
+    return check_rate_limit
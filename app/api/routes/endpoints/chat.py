@@ -1,5 +1,6 @@
-from app.api.dependencies import get_active_user, get_db
-from fastapi import APIRouter, Depends, HTTPException, status # type: ignore
+from app.api.dependencies import get_active_user, get_db, rate_limit
+from app.api.conditional import conditional_response
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status # type: ignore
 from sqlalchemy.orm import Session # type: ignore
 from typing import List
 from app.models.user import User
@@ -9,16 +10,19 @@ from app.api.schemas.chat import (
     ChatMessageResponse
 )
 from app.services.rag_service import RAGService
+from app.services.chat_history_service import ChatHistoryService
 from app.core.exceptions import StudyAssistantException
 
 router = APIRouter()
 
 rag_service = RAGService()
+history_service = ChatHistoryService(rag_service.llm_service)
 
 
-@router.post("/", response_model=ChatResponse)
+@router.post("/", response_model=ChatResponse, dependencies=[Depends(rate_limit("chat"))])
 async def chat(
     chat_request: ChatRequest,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_active_user),
     db: Session = Depends(get_db)
 ):
@@ -40,6 +44,9 @@ async def chat(
             db.commit()
             db.refresh(session)
         
+        # Load prior turns before the new message is added
+        summary, history, fold_due = history_service.load_history(session, db)
+        
         # Save user message
         user_message = ChatMessage(
             session_id=session.id,
@@ -52,7 +59,11 @@ async def chat(
         rag_response = await rag_service.generate_response(
             query=chat_request.message,
             user_id=current_user.id,
-            context_documents=chat_request.context_documents
+            context_documents=chat_request.context_documents,
+            conversation_history=history,
+            conversation_summary=summary,
+            mmr_lambda=chat_request.mmr_lambda,
+            section=chat_request.section
         )
         
         # Save assistant message
@@ -66,6 +77,10 @@ async def chat(
         
         db.commit()
         
+        # Fold older turns into the summary after the reply is sent
+        if fold_due:
+            background_tasks.add_task(history_service.fold_summary, session.id)
+        
         return ChatResponse(
             message=rag_response["response"],
             sources=rag_response["sources"],
@@ -76,8 +91,13 @@ async def chat(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
-@router.get("/sessions", response_model=List[ChatSessionResponse])
+@router.get(
+    "/sessions",
+    response_model=List[ChatSessionResponse],
+    dependencies=[Depends(rate_limit("read"))]
+)
 async def get_chat_sessions(
+    request: Request,
     current_user: User = Depends(get_active_user),
     db: Session = Depends(get_db)
 ):
@@ -85,12 +105,17 @@ async def get_chat_sessions(
         ChatSession.user_id == current_user.id
     ).order_by(ChatSession.updated_at.desc()).all()
     
-    return sessions
+    return conditional_response(request, List[ChatSessionResponse], sessions)
 
 
-@router.get("/sessions/{session_id}", response_model=ChatSessionResponse)
+@router.get(
+    "/sessions/{session_id}",
+    response_model=ChatSessionResponse,
+    dependencies=[Depends(rate_limit("read"))]
+)
 async def get_chat_session(
     session_id: int,
+    request: Request,
     current_user: User = Depends(get_active_user),
     db: Session = Depends(get_db)
 ):
@@ -105,7 +130,7 @@ async def get_chat_session(
             detail="Chat session not found"
         )
     
-    return session
+    return conditional_response(request, ChatSessionResponse, session)
 
 
 @router.post("/sessions", response_model=ChatSessionResponse)
@@ -1,18 +1,27 @@
-from app.api.dependencies import get_active_user, get_db
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query # type: ignore
+from app.api.dependencies import get_active_user, get_db, rate_limit
+from app.api.conditional import conditional_response
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File, Query # type: ignore
 from sqlalchemy.orm import Session # type: ignore
 from typing import List
 from app.models.user import User
 from app.models.document import Document
-from app.api.schemas.document import DocumentResponse, DocumentUpdate
+from app.api.schemas.document import (
+    DocumentResponse, DocumentUpdate, UploadSessionCreate, UploadSessionResponse,
+    BatchUploadResponse
+)
+from app.core.config import settings
 from app.services.document_service import DocumentService
-from app.core.exceptions import DocumentProcessingError
+from app.core.exceptions import DocumentProcessingError, UploadTooLargeError
 
 router = APIRouter()
 document_service = DocumentService()
 
 
-@router.post("/upload", response_model=DocumentResponse)
+@router.post(
+    "/upload",
+    response_model=DocumentResponse,
+    dependencies=[Depends(rate_limit("upload"))]
+)
 async def upload_document(
     file: UploadFile = File(...),
     current_user: User = Depends(get_active_user),
@@ -21,12 +30,110 @@ async def upload_document(
     try:
         document = await document_service.upload_document(file, current_user.id, db)
         return document
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
     except DocumentProcessingError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
-@router.get("/", response_model=List[DocumentResponse])
+@router.post(
+    "/upload-batch",
+    response_model=BatchUploadResponse,
+    dependencies=[Depends(rate_limit("upload_batch"))]
+)
+async def upload_documents(
+    files: List[UploadFile] = File(...),
+    current_user: User = Depends(get_active_user),
+    db: Session = Depends(get_db)
+):
+    if len(files) > settings.MAX_BATCH_UPLOAD_FILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.MAX_BATCH_UPLOAD_FILES} files can be uploaded at once"
+        )
+    
+    results = await document_service.upload_documents(files, current_user.id, db)
+    return {"documents": results}
+
+
+@router.post("/uploads", response_model=UploadSessionResponse)
+async def start_chunked_upload(
+    upload_data: UploadSessionCreate,
+    current_user: User = Depends(get_active_user)
+):
+    try:
+        return await document_service.uploads.start_upload(
+            upload_data.filename, upload_data.total_size, current_user.id
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except DocumentProcessingError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def get_chunked_upload(
+    upload_id: str,
+    current_user: User = Depends(get_active_user)
+):
+    try:
+        return await document_service.uploads.get_upload(upload_id, current_user.id)
+    except DocumentProcessingError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
+@router.put("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def upload_chunk(
+    upload_id: str,
+    offset: int = Query(..., ge=0),
+    chunk: UploadFile = File(...),
+    current_user: User = Depends(get_active_user)
+):
+    try:
+        return await document_service.uploads.append_chunk(
+            upload_id, current_user.id, offset, chunk
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except DocumentProcessingError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
+@router.post(
+    "/uploads/{upload_id}/complete",
+    response_model=DocumentResponse,
+    dependencies=[Depends(rate_limit("upload"))]
+)
+async def complete_chunked_upload(
+    upload_id: str,
+    current_user: User = Depends(get_active_user),
+    db: Session = Depends(get_db)
+):
+    try:
+        return await document_service.complete_chunked_upload(upload_id, current_user.id, db)
+    except DocumentProcessingError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.delete("/uploads/{upload_id}")
+async def abort_chunked_upload(
+    upload_id: str,
+    current_user: User = Depends(get_active_user)
+):
+    try:
+        await document_service.uploads.abort_upload(upload_id, current_user.id)
+        return {"message": "Upload aborted successfully"}
+    except DocumentProcessingError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
+@router.get(
+    "/",
+    response_model=List[DocumentResponse],
+    dependencies=[Depends(rate_limit("read"))]
+)
 async def get_documents(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     current_user: User = Depends(get_active_user),
@@ -35,12 +142,17 @@ async def get_documents(
     documents = document_service.get_user_documents(
         current_user.id, db, skip, limit
     )
-    return documents
+    return conditional_response(request, List[DocumentResponse], documents)
 
 
-@router.get("/{document_id}", response_model=DocumentResponse)
+@router.get(
+    "/{document_id}",
+    response_model=DocumentResponse,
+    dependencies=[Depends(rate_limit("read"))]
+)
 async def get_document(
     document_id: int,
+    request: Request,
     current_user: User = Depends(get_active_user),
     db: Session = Depends(get_db)
 ):
@@ -55,7 +167,7 @@ async def get_document(
             detail="Document not found"
         )
     
-    return document
+    return conditional_response(request, DocumentResponse, document)
 
 
 @router.put("/{document_id}", response_model=DocumentResponse)
@@ -84,6 +196,30 @@ async def update_document(
     return document
 
 
+@router.post(
+    "/{document_id}/reprocess",
+    response_model=DocumentResponse,
+    dependencies=[Depends(rate_limit("upload"))]
+)
+async def reprocess_document(
+    document_id: int,
+    current_user: User = Depends(get_active_user),
+    db: Session = Depends(get_db)
+):
+    try:
+        document = await document_service.reprocess_document(document_id, current_user.id, db)
+    except DocumentProcessingError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    
+    return document
+
+
 @router.delete("/{document_id}")
 async def delete_document(
     document_id: int,
@@ -91,7 +227,7 @@ async def delete_document(
     db: Session = Depends(get_db)
 ):
     try:
-        success = document_service.delete_document(document_id, current_user.id, db)
+        success = await document_service.delete_document(document_id, current_user.id, db)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -1,21 +1,26 @@
-from app.api.dependencies import get_active_user, get_db
-from fastapi import APIRouter, Depends, HTTPException, status # type: ignore
+from app.api.dependencies import get_active_user, get_db, rate_limit
+from fastapi import APIRouter, Depends, HTTPException, status, Query # type: ignore
 from sqlalchemy.orm import Session # type: ignore
 from typing import List, Dict, Any
 from app.models.user import User
+from app.core.config import settings
+from app.core.telemetry import record_cache
 from app.services.llm_service import LLMService
 from app.services.document_service import DocumentService
+from app.services.quiz_service import QuizService
+from app.services.summary_service import get_summary_service
 from app.models.document import Document
 
 router = APIRouter()
 llm_service = LLMService()
 document_service = DocumentService()
+quiz_service = QuizService(llm_service, document_service.vector_store)
 
 
-@router.post("/generate-quiz")
+@router.post("/generate-quiz", dependencies=[Depends(rate_limit("quiz"))])
 async def generate_quiz(
     document_id: int,
-    num_questions: int = 5,
+    num_questions: int = Query(5, ge=1, le=settings.QUIZ_MAX_QUESTIONS),
     current_user: User = Depends(get_active_user),
     db: Session = Depends(get_db)
 ):
@@ -38,9 +43,10 @@ async def generate_quiz(
         )
     
     try:
-        questions = await llm_service.generate_quiz_questions(
-            document.content,
-            num_questions
+        questions = await quiz_service.generate_quiz(
+            document,
+            num_questions,
+            db
         )
         
         return {
@@ -55,7 +61,7 @@ async def generate_quiz(
         )
 
 
-@router.post("/summarize")
+@router.post("/summarize", dependencies=[Depends(rate_limit("summary"))])
 async def summarize_document(
     document_id: int,
     current_user: User = Depends(get_active_user),
@@ -73,8 +79,11 @@ async def summarize_document(
             detail="Document not found"
         )
     
-    if document.summary:
-        return {"summary": document.summary}
+    # Ingestion only stores an extractive summary; the first call here replaces it
+    refined = bool(document.summary) and document.summary_type != "extractive"
+    record_cache("summary", refined)
+    if refined:
+        return {"summary": document.summary, "summary_type": document.summary_type or "llm"}
     
     if not document.content:
         raise HTTPException(
@@ -83,13 +92,8 @@ async def summarize_document(
         )
     
     try:
-        summary = await llm_service.generate_summary(document.content)
-        
-        # Save summary to database
-        document.summary = summary
-        db.commit()
-        
-        return {"summary": summary}
+        summary = await get_summary_service().refine(document, db)
+        return {"summary": summary, "summary_type": document.summary_type}
         
     except Exception as e:
         raise HTTPException(
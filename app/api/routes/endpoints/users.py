@@ -3,8 +3,11 @@ from fastapi import APIRouter, Depends, HTTPException, status # type: ignore
 from sqlalchemy.orm import Session # type: ignore
 from app.models.user import User
 from app.api.schemas.user import UserResponse, UserUpdate
+from app.services.document_service import DocumentService
+from app.core.exceptions import DocumentProcessingError
 
 router = APIRouter()
+document_service = DocumentService()
 
 
 @router.get("/me", response_model=UserResponse)
@@ -39,4 +42,21 @@ async def update_current_user(
     db.commit()
     db.refresh(current_user)
     
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+@router.delete("/me")
+async def delete_current_user(
+    current_user: User = Depends(get_active_user),
+    db: Session = Depends(get_db)
+):
+    try:
+        # Remove files and vectors first; the rest cascades from the user row
+        await document_service.delete_user_documents(current_user.id, db)
+    except DocumentProcessingError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    db.delete(current_user)
+    db.commit()
+    
+    return {"message": "Account deleted successfully"}
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel # type: ignore
+from pydantic import BaseModel, Field # type: ignore
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 
@@ -43,6 +43,10 @@ class ChatRequest(BaseModel):
     message: str
     session_id: Optional[int] = None
     context_documents: Optional[List[int]] = None
+    # MMR trade-off from diversity (0.0) to pure relevance (1.0); defaults to RETRIEVAL_MMR_LAMBDA
+    mmr_lambda: Optional[float] = Field(None, ge=0.0, le=1.0)
+    # Only retrieve from chunks under this heading path, e.g. "Methods" or "Methods > Sampling"
+    section: Optional[str] = None
 
 
 class ChatResponse(BaseModel):
@@ -20,7 +20,9 @@ class DocumentUpdate(BaseModel):
 class DocumentResponse(DocumentBase):
     id: int
     file_size: Optional[int]
+    content_hash: Optional[str] = None
     summary: Optional[str]
+    summary_type: Optional[str] = None
     is_processed: bool
     processing_status: str
     owner_id: int
@@ -36,4 +38,27 @@ class DocumentChunkResponse(BaseModel):
     chunk_index: int
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    total_size: int
+
+
+class UploadSessionResponse(BaseModel):
+    upload_id: str
+    filename: str
+    total_size: int
+    offset: int
+
+
+class BatchUploadItem(BaseModel):
+    filename: str
+    document_id: Optional[int] = None
+    status: str
+    error: Optional[str] = None
+
+
+class BatchUploadResponse(BaseModel):
+    documents: List[BatchUploadItem]
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""Maintenance commands, run next to the API with the same settings.
+
+    python -m app.cli rebuild-coarse-index
+    python -m app.cli reembed --model all-mpnet-base-v2     # resumable; API keeps serving
+    python -m app.cli reembed-status
+    python -m app.cli reembed-abort
+    python -m app.cli snapshot [--full]                       # incremental unless --full
+    python -m app.cli snapshots
+    python -m app.cli restore [--upto NAME] [--collection NAME]
+"""
+import argparse
+import json
+
+from app.core.database import SessionLocal
+from app.core.migrations import upgrade_schema
+from app.services.reembedding_service import ReembeddingService
+from app.services.vector_snapshot_service import VectorSnapshotService
+from app.services.vector_store_service import VectorStoreService
+
+
+def rebuild_coarse_index(args):
+    count = VectorStoreService().rebuild_coarse_index(args.batch_size)
+    print(f"Rebuilt centroids for {count} documents")
+
+
+def reembed(args):
+    def report(migration):
+        print(f"{migration['done']}/{migration['total']} chunks re-embedded", flush=True)
+
+    upgrade_schema()
+    db = SessionLocal()
+    try:
+        index = ReembeddingService().run(
+            db,
+            args.model,
+            batch_size=args.batch_size,
+            pause_seconds=args.pause,
+            drop_old=args.drop_old,
+            progress=report
+        )
+    finally:
+        db.close()
+    print(f"Now serving {index['collection']} ({index['embedding_model']})")
+
+
+def reembed_status(args):
+    print(json.dumps(ReembeddingService().status(), indent=2))
+
+
+def reembed_abort(args):
+    migration = ReembeddingService().abort()
+    print(f"Aborted migration to {migration['embedding_model']}" if migration else "No migration running")
+
+
+def snapshot(args):
+    entry = VectorSnapshotService().create_snapshot(full=args.full, batch_size=args.batch_size)
+    print(
+        f"{entry['name']}: {entry['vectors']} vectors written, {entry['deleted']} deleted, "
+        f"{entry['bytes'] / (1024 * 1024):.1f} MiB in {entry['duration_seconds']}s"
+    )
+
+
+def snapshots(args):
+    for entry in VectorSnapshotService().list_snapshots():
+        print(f"{entry['name']:<32}{entry['vectors']:>10} vectors{entry['deleted']:>8} deleted  {entry['embedding_model']}")
+
+
+def restore(args):
+    report = VectorSnapshotService().restore(upto=args.upto, collection_name=args.collection)
+    print(json.dumps(report, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("rebuild-coarse-index", help="recompute document centroids from chunk vectors")
+    command.add_argument("--batch-size", type=int, default=1000)
+    command.set_defaults(handler=rebuild_coarse_index)
+
+    command = commands.add_parser("reembed", help="re-embed every chunk with another model and switch over")
+    command.add_argument("--model", required=True)
+    command.add_argument("--batch-size", type=int, default=None)
+    command.add_argument("--pause", type=float, default=None, help="seconds between batches")
+    command.add_argument("--drop-old", action="store_true", help="delete the old collections after switching")
+    command.set_defaults(handler=reembed)
+
+    command = commands.add_parser("reembed-status", help="show the active index and migration progress")
+    command.set_defaults(handler=reembed_status)
+
+    command = commands.add_parser("reembed-abort", help="stop writing to and drop a migration's shadow collection")
+    command.set_defaults(handler=reembed_abort)
+
+    command = commands.add_parser("snapshot", help="export the vector store (incremental by default)")
+    command.add_argument("--full", action="store_true")
+    command.add_argument("--batch-size", type=int, default=1000)
+    command.set_defaults(handler=snapshot)
+
+    command = commands.add_parser("snapshots", help="list snapshots")
+    command.set_defaults(handler=snapshots)
+
+    command = commands.add_parser("restore", help="bulk-load the vector store from snapshots")
+    command.add_argument("--upto", help="restore the state as of this snapshot (default: latest)")
+    command.add_argument("--collection", help="restore into this collection (default: a new one named after the snapshotted one)")
+    command.set_defaults(handler=restore)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import zlib
+from starlette.datastructures import Headers, MutableHeaders # type: ignore
+
+from app.core.config import settings
+
+try:
+    import zstandard # type: ignore
+except ImportError:  # optional; gzip is used without it
+    zstandard = None
+
+
+def negotiate_encoding(accept_encoding: str) -> str:
+    accepted = set()
+    for part in accept_encoding.split(","):
+        token, _, params = part.partition(";")
+        name, _, value = params.strip().partition("=")
+        try:
+            # "gzip;q=0" explicitly refuses an encoding
+            if name.strip() == "q" and float(value) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(token.strip().lower())
+
+    if zstandard is not None and "zstd" in accepted:
+        return "zstd"
+    if "gzip" in accepted:
+        return "gzip"
+    return ""
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        if encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(
+                level=settings.RESPONSE_ZSTD_LEVEL
+            ).compressobj()
+            self._flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            # wbits=31 writes the gzip header and trailer
+            self._compressor = zlib.compressobj(settings.RESPONSE_GZIP_LEVEL, zlib.DEFLATED, 31)
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if final:
+            return self._compressor.compress(data) + self._compressor.flush()
+        # Flush each streamed message so the client isn't kept waiting on a buffer
+        return self._compressor.compress(data) + self._compressor.flush(self._flush_mode)
+
+
+class CompressionMiddleware:
+    # Compresses responses of at least RESPONSE_COMPRESSION_MIN_BYTES with zstd
+    # when the client accepts it and zstandard is installed, otherwise gzip.
+    # Small bodies go out as they are: below a kilobyte or so the headers cost
+    # more than compression saves.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Clients that accept no encoding still go through _CompressingSend,
+        # which marks every response as varying by Accept-Encoding
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        await self.app(scope, receive, _CompressingSend(send, encoding))
+
+
+class _CompressingSend:
+    def __init__(self, send, encoding: str):
+        self.send = send
+        self.encoding = encoding
+        self.start_message = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = MutableHeaders(raw=message["headers"])
+            # Leave alone anything already encoded
+            self.passthrough = "content-encoding" in headers or not self.encoding
+            if "content-encoding" not in headers:
+                headers.add_vary_header("Accept-Encoding")
+                # A strong ETag promises identical bytes, which gzip, zstd and
+                # identity bodies of one representation aren't. Weaken it for
+                # every response to a compressing client, 304s included, so
+                # the validator doesn't change with the body size.
+                etag = headers.get("etag")
+                if self.encoding and etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send_start()
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            if not more_body and len(body) < settings.RESPONSE_COMPRESSION_MIN_BYTES:
+                self.passthrough = True
+                await self._send_start()
+                await self.send(message)
+                return
+
+            self.compressor = _Compressor(self.encoding)
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            if more_body:
+                # Length of a stream isn't known up front
+                del headers["Content-Length"]
+            else:
+                body = self.compressor.compress(body, final=True)
+                headers["Content-Length"] = str(len(body))
+                await self._send_start()
+                await self.send({"type": "http.response.body", "body": body, "more_body": False})
+                return
+            await self._send_start()
+
+        await self.send({
+            "type": "http.response.body",
+            "body": self.compressor.compress(body, final=not more_body),
+            "more_body": more_body
+        })
+
+    async def _send_start(self):
+        if self.start_message is not None:
+            await self.send(self.start_message)
+            self.start_message = None
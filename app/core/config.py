@@ -0,0 +1,134 @@
+from typing import Dict, List, Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict # type: ignore
+
+
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        extra="ignore"
+    )
+
+    ENV: str = "development"
+    DEBUG: bool = False
+    PORT: int = 8000
+
+    # Observability
+    METRICS_ENABLED: bool = True
+    TRACING_ENABLED: bool = False
+    OTEL_SERVICE_NAME: str = "study-assistant-api"
+    PROFILING_ENABLED: bool = False  # allows X-Profile: 1 and sampled request profiles
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL_SECONDS: float = 0.005
+    PROFILE_DIR: str = "./profiles"
+    PROFILE_ALLOCATIONS: bool = False  # tracemalloc peaks for ingestion jobs
+
+    # HTTP responses
+    RESPONSE_COMPRESSION_ENABLED: bool = True
+    RESPONSE_COMPRESSION_MIN_BYTES: int = 1024
+    RESPONSE_GZIP_LEVEL: int = 6
+    RESPONSE_ZSTD_LEVEL: int = 3  # used when zstandard is installed and the client accepts zstd
+
+    # Database
+    DATABASE_URL: str = "sqlite:///./study_assistant.db"
+
+    # Redis
+    REDIS_HOST: str = "localhost"
+    REDIS_PORT: int = 6379
+
+    # Rate limiting
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # memory (per worker) or redis (shared by all workers)
+    RATE_LIMIT_CAPACITY: float = 60.0  # tokens a user can spend in a burst
+    RATE_LIMIT_REFILL_PER_SECOND: float = 1.0
+    RATE_LIMIT_COSTS: Dict[str, float] = {
+        "read": 1.0,
+        "upload": 5.0,
+        "upload_batch": 20.0,
+        "chat": 10.0,
+        "summary": 10.0,
+        "quiz": 20.0
+    }
+
+    # Auth
+    SECRET_KEY: str = "change-me"
+    ALGORITHM: str = "HS256"
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+
+    # LLM
+    LLM_BACKEND: str = "ollama"  # ollama, openai (any compatible server) or fake
+    OPENAI_SECRET_KEY: str = ""
+    OPENAI_BASE_URL: str = "https://api.openai.com/v1"
+    OLLAMA_HOST: str = "http://localhost:11434"
+    LLM_MODEL: str = "mistral"
+    LLM_MAX_CONCURRENCY: int = 2  # generations admitted to the model server at once
+    LLM_TIMEOUT_SECONDS: float = 300.0
+    LLM_KEEP_ALIVE: str = "30m"  # how long the model stays loaded after a request
+    LLM_WARMUP: bool = True
+    LLM_CHAT_NUM_CTX: int = 4096
+    LLM_CHAT_NUM_PREDICT: int = 1000
+    LLM_SUMMARY_NUM_CTX: int = 8192
+    LLM_SUMMARY_NUM_PREDICT: int = 300
+    LLM_QUIZ_NUM_CTX: int = 8192
+    LLM_QUIZ_NUM_PREDICT: int = 1500
+
+    # Deterministic fake backend for offline load tests
+    FAKE_LLM_LATENCY_SECONDS: float = 0.05
+    FAKE_LLM_TOKENS_PER_SECOND: float = 50.0
+    FAKE_LLM_REPLY_TOKENS: int = 64
+
+    # Vector store / embeddings
+    CHROMA_PERSIST_DIRECTORY: str = "./chroma_db"
+    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    CHUNK_SIZE: int = 1000
+    CHUNK_OVERLAP: int = 200
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_BACKEND: str = "torch"  # torch or onnx
+    EMBEDDING_ONNX_QUANTIZE: bool = False  # int8 dynamic quantization of the ONNX model
+    EMBEDDING_THREADS: int = 0  # 0 lets torch / onnxruntime pick
+    ONNX_MODEL_DIR: str = "./onnx_models"
+    EMBEDDING_BATCH_WINDOW_MS: float = 5.0  # how long an encode request waits to share a batch; 0 disables batching
+    PRELOAD_MODELS: bool = False  # load the embedding model and Chroma during startup
+    VECTOR_DELETE_BATCH_SIZE: int = 500
+    VECTOR_GC_INTERVAL_SECONDS: int = 3600  # 0 disables the background collector
+    VECTOR_GC_BATCH_SIZE: int = 1000
+    VECTOR_GC_COMPACT: bool = False
+    REEMBED_BATCH_SIZE: int = 256  # chunks per batch of a re-embedding migration
+    REEMBED_PAUSE_SECONDS: float = 0.5  # pause between migration batches to leave CPU for requests
+    VECTOR_SNAPSHOT_DIR: str = "./snapshots"
+
+    # Uploads
+    UPLOAD_DIR: str = "./uploads"
+    ALLOWED_FILE_TYPES: List[str] = [".pdf", ".txt", ".docx", ".md"]
+    MAX_UPLOAD_SIZE: int = 50 * 1024 * 1024  # bytes
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # bytes read/written per step
+    MAX_BATCH_UPLOAD_FILES: int = 50
+    EXTRACTION_WORKERS: int = 4
+    EXTRACTION_CACHE_ENABLED: bool = True
+    EXTRACTION_CACHE_DIR: str = "./extraction_cache"
+
+    # Retrieval
+    RETRIEVAL_MMR_LAMBDA: Optional[float] = None  # set (e.g. 0.7) to diversify results with MMR; 1.0 is pure relevance
+    RETRIEVAL_MMR_FETCH_FACTOR: int = 4  # candidates fetched per requested result in MMR mode
+    RETRIEVAL_DUPLICATE_THRESHOLD: float = 0.95  # cosine similarity above which MMR drops a candidate as a near-duplicate
+    RETRIEVAL_COARSE_DOCUMENTS: int = 0  # documents kept by the centroid pre-filter; 0 searches every chunk
+
+    # Summaries
+    SUMMARY_EXTRACTIVE_SENTENCES: int = 5
+    SUMMARY_BACKGROUND_REFINE: bool = False  # replace extractive summaries with LLM ones while the LLM is idle
+    SUMMARY_BACKGROUND_IDLE_POLL_SECONDS: float = 2.0
+
+    # Chat history
+    CHAT_HISTORY_TURNS: int = 6  # recent user/assistant turns sent verbatim
+    CHAT_SUMMARY_BATCH_TURNS: int = 4  # older turns folded into the summary at once
+    CHAT_HISTORY_TOKEN_BUDGET: int = 2000
+    CHAT_SUMMARY_TOKEN_BUDGET: int = 400
+
+    # Quiz generation
+    QUIZ_MAX_QUESTIONS: int = 50
+    QUIZ_MAX_CLUSTERS: int = 5
+    QUIZ_CHUNKS_PER_CLUSTER: int = 2
+    QUIZ_CACHE_SIZE: int = 256
+    QUIZ_MAX_RETRIES: int = 2  # extra calls allowed to fill in missing questions
+
+
+settings = Settings()
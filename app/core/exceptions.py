@@ -11,6 +11,10 @@ class DocumentProcessingError(StudyAssistantException):
     pass
 
 
+class UploadTooLargeError(DocumentProcessingError):
+    pass
+
+
 class EmbeddingError(StudyAssistantException):
     pass
 
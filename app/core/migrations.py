@@ -0,0 +1,34 @@
+import logging
+from sqlalchemy import inspect, text # type: ignore
+
+from app.core.database import Base, engine
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade_schema():
+    # create_all only creates missing tables. Columns and indexes added to the
+    # models since a table was created are applied here, so databases created
+    # by older versions keep working without a reset. Additive only: nothing
+    # is dropped or retyped, and added columns start out NULL.
+    from app.models import chat, document, study_session, user  # noqa: F401  registers the tables
+
+    Base.metadata.create_all(bind=engine)
+
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(
+                    f"ALTER TABLE {preparer.format_table(table)} "
+                    f"ADD COLUMN {preparer.format_column(column)} {column_type}"
+                ))
+                logger.info("Added column %s.%s", table.name, column.name)
+
+            for index in table.indexes:
+                index.create(bind=connection, checkfirst=True)
@@ -0,0 +1,204 @@
+from typing import Any, Callable, Dict, Optional
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+from pathlib import Path
+import logging
+import random
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from fastapi.concurrency import run_in_threadpool # type: ignore
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+peak_allocated_bytes = registry.histogram(
+    "ingest_peak_allocated_bytes",
+    "Peak Python heap allocated during an ingestion job",
+    buckets=tuple(2 ** power for power in range(20, 33))
+)
+
+# Stacks reported back by process pool workers for the request being profiled
+_worker_stacks: ContextVar[Optional[Counter]] = ContextVar("worker_stacks", default=None)
+
+# Leaf modules of a thread parked waiting for work
+_IDLE_MODULES = {"threading", "queue", "selectors"}
+
+# Overlapping trace_allocations jobs share one tracemalloc session
+_tracing_lock = threading.Lock()
+_tracing_jobs = 0
+
+
+class StackSampler:
+    # Samples one thread's Python stack at a fixed interval and counts folded
+    # stacks ("outer;inner;leaf"), the input format of flamegraph.pl and speedscope.
+    # With all_threads, busy threads other than thread_id (threadpool workers)
+    # are sampled too, each stack rooted at its thread's name.
+    def __init__(self, thread_id: int, interval: float, all_threads: bool = False):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.all_threads = all_threads
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            if not self.all_threads:
+                frame = sys._current_frames().get(self.thread_id)
+                if frame is not None:
+                    self.stacks[";".join(_fold(frame))] += 1
+                continue
+
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                frames = _fold(frame)
+                if thread_id != self.thread_id and frames[-1].split(":")[0] in _IDLE_MODULES:
+                    continue
+                self.stacks[";".join([names.get(thread_id, str(thread_id))] + frames)] += 1
+
+
+def _fold(frame) -> list:
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{Path(code.co_filename).stem}:{code.co_name}")
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+class ProfilingMiddleware:
+    # Opt-in per request via the X-Profile header or at PROFILING_SAMPLE_RATE.
+    # It samples the event loop thread and busy threadpool threads, so
+    # concurrently running requests on the same worker show up in each other's
+    # profiles; profile under light load or read the flamegraph with that in
+    # mind. Work sent to the process pool through run_in_process is sampled in
+    # the worker and merged in.
+    def __init__(self, app):
+        self.app = app
+        self.output_dir = Path(settings.PROFILE_DIR)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        sampler = StackSampler(threading.get_ident(), settings.PROFILING_INTERVAL_SECONDS, all_threads=True)
+        worker_stacks = Counter()
+        token = _worker_stacks.set(worker_stacks)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _worker_stacks.reset(token)
+            stacks = sampler.stop()
+            stacks.update(worker_stacks)
+            if stacks:
+                await run_in_threadpool(self._write, self._endpoint_name(scope), stacks)
+
+    def _should_profile(self, scope) -> bool:
+        for name, value in scope.get("headers", []):
+            if name == b"x-profile":
+                return value in (b"1", b"true")
+        return random.random() < settings.PROFILING_SAMPLE_RATE
+
+    def _endpoint_name(self, scope) -> str:
+        # Route template keeps /documents/{document_id} in one file
+        route = scope.get("route")
+        path = getattr(route, "path", None) or scope["path"]
+        name = f"{scope['method']}_{path}"
+        return re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_")
+
+    def _write(self, endpoint: str, stacks: Dict[str, int]):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.output_dir / f"{endpoint}.folded", "a") as file:
+            for stack, count in stacks.items():
+                file.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def trace_allocations(label: str, document_id: Optional[int] = None):
+    # Peak heap for an ingestion job. tracemalloc is process-wide, so jobs that
+    # overlap report the combined peak. It only sees this process: extraction
+    # in the process pool is reported separately by run_in_process.
+    if not settings.PROFILE_ALLOCATIONS:
+        yield
+        return
+
+    global _tracing_jobs
+    with _tracing_lock:
+        if _tracing_jobs == 0:
+            tracemalloc.start()
+        _tracing_jobs += 1
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _, peak = tracemalloc.get_traced_memory()
+        with _tracing_lock:
+            _tracing_jobs -= 1
+            # Tracing slows every allocation; stop once no job needs it
+            if _tracing_jobs == 0:
+                tracemalloc.stop()
+        peak_allocated_bytes.observe(peak, job=label)
+        logger.info(
+            "%s (document %s): peak %.1f MiB over %.2fs",
+            label, document_id, peak / (1024 * 1024), time.perf_counter() - started
+        )
+
+
+async def run_in_process(executor, fn: Callable, *args) -> Any:
+    # Pool workers are other processes, invisible to the request sampler and
+    # to tracemalloc here, so when either is on the worker profiles the call
+    # itself and sends the results back with the return value
+    stacks = _worker_stacks.get()
+    sample = stacks is not None
+    trace = settings.PROFILE_ALLOCATIONS
+    loop = asyncio.get_running_loop()
+    if not sample and not trace:
+        return await loop.run_in_executor(executor, fn, *args)
+
+    result, worker_stacks, peak = await loop.run_in_executor(
+        executor, _profile_call, fn, args, sample, trace
+    )
+    if worker_stacks:
+        stacks.update(worker_stacks)
+    if peak is not None:
+        peak_allocated_bytes.observe(peak, job=fn.__name__)
+    return result
+
+
+def _profile_call(fn: Callable, args: tuple, sample: bool, trace: bool):
+    # Runs in the pool worker
+    sampler = StackSampler(threading.get_ident(), settings.PROFILING_INTERVAL_SECONDS) if sample else None
+    if trace:
+        tracemalloc.start()
+    if sampler:
+        sampler.start()
+    try:
+        result = fn(*args)
+    finally:
+        stacks = sampler.stop() if sampler else None
+        peak = tracemalloc.get_traced_memory()[1] if trace else None
+        if trace:
+            tracemalloc.stop()
+    return result, stacks, peak
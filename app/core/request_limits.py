@@ -0,0 +1,70 @@
+from starlette.datastructures import Headers # type: ignore
+from starlette.responses import JSONResponse # type: ignore
+
+from app.core.config import settings
+
+# Room for multipart boundaries, part headers and form fields around the file bytes
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class RequestSizeLimitMiddleware:
+    # Starlette reads a whole multipart body into a temp file before the
+    # endpoint runs, so the upload size cap in UploadService only applies once
+    # an oversized file has already been received. This rejects such requests
+    # up front from Content-Length, and cuts off bodies without one (chunked
+    # transfer) as soon as they pass the limit.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limit = self._limit(scope["path"])
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > limit:
+            await self._reject(scope, receive, send, limit)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise _BodyTooLarge()
+            return message
+
+        async def tracked_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except _BodyTooLarge:
+            if response_started:
+                raise
+            await self._reject(scope, receive, send, limit)
+
+    def _limit(self, path: str) -> int:
+        if path.rstrip("/").endswith("/upload-batch"):
+            return settings.MAX_UPLOAD_SIZE * settings.MAX_BATCH_UPLOAD_FILES + MULTIPART_OVERHEAD
+        return settings.MAX_UPLOAD_SIZE + MULTIPART_OVERHEAD
+
+    async def _reject(self, scope, receive, send, limit: int):
+        response = JSONResponse(
+            {"detail": f"Request body exceeds maximum size of {limit} bytes"},
+            status_code=413,
+            headers={"Connection": "close"}
+        )
+        await response(scope, receive, send)
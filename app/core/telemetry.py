@@ -0,0 +1,82 @@
+import time
+from opentelemetry import trace # type: ignore
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+stage_seconds = registry.histogram(
+    "stage_duration_seconds",
+    "Time spent in each stage of the chat and ingestion pipelines"
+)
+cache_requests = registry.counter(
+    "cache_requests_total",
+    "Cache lookups by cache and result (hit or miss)"
+)
+
+tracer = trace.get_tracer("study_assistant")
+
+
+def setup_tracing():
+    # Export spans over OTLP; the endpoint comes from OTEL_EXPORTER_OTLP_ENDPOINT
+    if not settings.TRACING_ENABLED:
+        return
+
+    from opentelemetry.sdk.resources import Resource # type: ignore
+    from opentelemetry.sdk.trace import TracerProvider # type: ignore
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor # type: ignore
+    from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter # type: ignore
+
+    provider = TracerProvider(resource=Resource.create({"service.name": settings.OTEL_SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+
+
+class _StageTimer:
+    __slots__ = ("pipeline", "stage", "started", "span")
+
+    def __init__(self, pipeline: str, stage: str):
+        self.pipeline = pipeline
+        self.stage = stage
+        self.span = None
+
+    def __enter__(self):
+        if settings.TRACING_ENABLED:
+            self.span = tracer.start_as_current_span(f"{self.pipeline}.{self.stage}")
+            self.span.__enter__()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stage_seconds.observe(
+            time.perf_counter() - self.started,
+            pipeline=self.pipeline,
+            stage=self.stage
+        )
+        if self.span is not None:
+            self.span.__exit__(exc_type, exc, tb)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+def stage_timer(pipeline: str, stage: str):
+    # Usage: `with stage_timer("chat", "generate"): ...`; free when metrics are off
+    if not settings.METRICS_ENABLED:
+        return _NOOP_TIMER
+    return _StageTimer(pipeline, stage)
+
+
+def record_cache(cache: str, hit: bool):
+    if settings.METRICS_ENABLED:
+        cache_requests.inc(cache=cache, result="hit" if hit else "miss")
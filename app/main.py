@@ -1,28 +1,89 @@
 import os
+import asyncio
+import logging
 from fastapi import FastAPI, HTTPException # type: ignore
 from fastapi.middleware.cors import CORSMiddleware # type: ignore
+from fastapi.responses import ORJSONResponse, PlainTextResponse # type: ignore
+from fastapi.concurrency import run_in_threadpool # type: ignore
 from contextlib import asynccontextmanager
 from app.api.routes.api_router import router as api_router
 from app.core.config import settings
-from app.core.database import Base, engine
+from app.core.migrations import upgrade_schema
+from app.core.metrics import registry
+from app.core.telemetry import setup_tracing
+from app.core.profiling import ProfilingMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.request_limits import RequestSizeLimitMiddleware
+from app.services.vector_gc_service import VectorGCService
+from app.services.llm_service import LLMService
+from app.services.summary_service import get_summary_service
+from app.services.vector_store_service import VectorStoreService, read_active_index
+
+logger = logging.getLogger(__name__)
+
+
+async def warm_up_llm():
+    try:
+        await LLMService().warmup()
+    except Exception:
+        logger.exception("LLM warm-up failed")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    Base.metadata.create_all(bind=engine)
+    upgrade_schema()
+    setup_tracing()
+    
+    active_model = read_active_index()["embedding_model"]
+    if active_model != settings.EMBEDDING_MODEL:
+        logger.warning(
+            "EMBEDDING_MODEL is %s but the vector store was built with %s; "
+            "run `python -m app.cli reembed --model %s` to migrate",
+            settings.EMBEDDING_MODEL, active_model, settings.EMBEDDING_MODEL
+        )
+    
+    # Heavy dependencies load on first use unless preloading is requested
+    if settings.PRELOAD_MODELS:
+        await run_in_threadpool(VectorStoreService().warmup)
+    
+    # Load the model in the background so startup isn't blocked on it
+    warmup_task = None
+    if settings.LLM_WARMUP:
+        warmup_task = asyncio.create_task(warm_up_llm())
+    
+    vector_gc_task = None
+    if settings.VECTOR_GC_INTERVAL_SECONDS > 0:
+        vector_gc_task = asyncio.create_task(
+            VectorGCService().run_periodically(settings.VECTOR_GC_INTERVAL_SECONDS)
+        )
+    
+    summary_task = None
+    if settings.SUMMARY_BACKGROUND_REFINE:
+        summary_task = asyncio.create_task(get_summary_service().run_background_refiner())
+    
     yield
+    
     # Shutdown
-    pass
+    if warmup_task:
+        warmup_task.cancel()
+    if vector_gc_task:
+        vector_gc_task.cancel()
+    if summary_task:
+        summary_task.cancel()
 
 
 app = FastAPI(
     title="RAG-Based Personal Study Assistant API",
     description="A personal study assistant with RAG capabilities",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 
+# Inside CORS so browsers can read the 413
+app.add_middleware(RequestSizeLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -31,6 +92,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Sampling profiler for individual requests; see app/core/profiling.py
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# Outermost, so it compresses what the profiler and CORS layers send
+if settings.RESPONSE_COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
 app.include_router(api_router)
 
 @app.get("/")
@@ -48,6 +117,13 @@ async def health_check():
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return registry.render()
+
+
 if __name__ == "__main__":
     import uvicorn # type: ignore
 
@@ -1,5 +1,5 @@
 from app.core.database import Base
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON # type: ignore
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON, Index # type: ignore
 from sqlalchemy.orm import relationship # type: ignore
 from sqlalchemy.sql import func # type: ignore
 
@@ -34,6 +34,14 @@ class ChatSession(Base):
         onupdate=func.now()
     )
     
+    # Rolling summary of the turns that fell out of the history window
+    summary = Column(Text)
+    
+    summarized_until_id = Column(
+        Integer, 
+        default=0
+    )  # Last message folded into the summary
+    
     # Relationships
     user = relationship(
         "User", 
@@ -42,12 +50,16 @@ class ChatSession(Base):
     
     messages = relationship(
         "ChatMessage", 
-        back_populates="session"
+        back_populates="session",
+        cascade="all, delete-orphan"
     )
 
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        Index("ix_chat_messages_session_id_id", "session_id", "id"),
+    )
     
     id = Column(
         Integer, 
@@ -12,8 +12,10 @@ class Document(Base):
     file_path = Column(String, nullable=False)
     file_type = Column(String, nullable=False)
     file_size = Column(Integer)
+    content_hash = Column(String, index=True)  # sha256 of the uploaded file
     content = Column(Text)
     summary = Column(Text)
+    summary_type = Column(String)  # "extractive" at ingest, "llm" once refined
     is_processed = Column(Boolean, default=False)
     processing_status = Column(String, default="pending")
     owner_id = Column(Integer, ForeignKey("users.id"))
@@ -22,16 +24,21 @@ class Document(Base):
     
     # Relationships
     owner = relationship("User", back_populates="documents")
-    chunks = relationship("DocumentChunk", back_populates="document")
+    chunks = relationship(
+        "DocumentChunk",
+        back_populates="document",
+        cascade="all, delete-orphan"
+    )
 
 
 class DocumentChunk(Base):
     __tablename__ = "document_chunks"
     
     id = Column(Integer, primary_key=True, index=True)
-    document_id = Column(Integer, ForeignKey("documents.id"))
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), index=True)
     chunk_text = Column(Text, nullable=False)
     chunk_index = Column(Integer, nullable=False)
+    section = Column(String)  # heading path, e.g. "Methods > Sampling"
     embedding_id = Column(String)  # Reference to vector store
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
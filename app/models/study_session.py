@@ -19,7 +19,7 @@ class StudySession(Base):
     
     # Relationships
     user = relationship("User", back_populates="study_sessions")
-    activities = relationship("StudyActivity", back_populates="session")
+    activities = relationship("StudyActivity", back_populates="session", cascade="all, delete-orphan")
 
 
 class StudyActivity(Base):
@@ -53,15 +53,18 @@ class User(Base):
     # Relationships
     documents = relationship(
         "Document", 
-        back_populates="owner"
+        back_populates="owner",
+        cascade="all, delete-orphan"
     )
     
     study_sessions = relationship(
         "StudySession", 
-        back_populates="user"
+        back_populates="user",
+        cascade="all, delete-orphan"
     )
     
     chat_sessions = relationship(
         "ChatSession", 
-        back_populates="user"
+        back_populates="user",
+        cascade="all, delete-orphan"
     )
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 import re
 from app.core.config import settings
 
@@ -15,10 +15,59 @@ class TextChunker:
         # Split into sentences first
         sentences = self._split_into_sentences(text)
         
+        return [
+            {"text": chunk, "chunk_index": chunk_index, "document_id": document_id}
+            for chunk_index, chunk in enumerate(self._pack_sentences(sentences))
+        ]
+    
+    def chunk_segments(self, segments: List[Dict[str, Any]], document_id: int = None) -> List[Dict[str, Any]]:
+        # Segments come from DocumentProcessor.extract_segments. A chunk never
+        # spans two sections: a heading starts a new chunk, prose is packed by
+        # sentence as in chunk_text, and tables and code blocks become chunks
+        # of their own with their line breaks kept.
+        pieces: List[Tuple[str, str]] = []
+        sentences: List[str] = []
+        section = ""
+        heading_only = False
+        
+        def flush():
+            pieces.extend((chunk, section) for chunk in self._pack_sentences(sentences))
+            sentences.clear()
+        
+        for segment in segments:
+            kind = segment["kind"]
+            segment_section = segment.get("section", "")
+            is_block = kind in ("table", "code") and bool(segment["text"].strip())
+            
+            # A heading directly above a table or code block leads its first chunk
+            lead = ""
+            if is_block and heading_only and segment_section == section:
+                lead = sentences.pop() + "\n"
+            
+            if kind != "text" or segment_section != section:
+                flush()
+                section = segment_section
+            heading_only = kind == "heading"
+            
+            if is_block:
+                blocks = self._split_block(segment["text"], kind == "table")
+                blocks[0] = lead + blocks[0]
+                pieces.extend((chunk, section) for chunk in blocks)
+            elif kind == "heading":
+                sentences.append(segment["text"].strip())
+            elif kind == "text":
+                sentences.extend(self._split_into_sentences(self._clean_text(segment["text"])))
+        flush()
+        
+        return [
+            {"text": chunk, "chunk_index": chunk_index, "document_id": document_id, "section": section}
+            for chunk_index, (chunk, section) in enumerate(pieces)
+        ]
+    
+    def _pack_sentences(self, sentences: List[str]) -> List[str]:
         chunks = []
         current_chunk = ""
         current_length = 0
-        chunk_index = 0
         
         for sentence in sentences:
             sentence_length = len(sentence)
@@ -26,17 +75,12 @@ class TextChunker:
             # If adding this sentence would exceed chunk size
             if current_length + sentence_length > self.chunk_size and current_chunk:
                 # Save current chunk
-                chunks.append({
-                    "text": current_chunk.strip(),
-                    "chunk_index": chunk_index,
-                    "document_id": document_id
-                })
+                chunks.append(current_chunk.strip())
                 
                 # Start new chunk with overlap
                 overlap_text = self._get_overlap_text(current_chunk)
                 current_chunk = overlap_text + " " + sentence
                 current_length = len(current_chunk)
-                chunk_index += 1
             else:
                 # Add sentence to current chunk
                 if current_chunk:
@@ -47,12 +91,36 @@ class TextChunker:
         
         # Add final chunk if it has content
         if current_chunk.strip():
-            chunks.append({
-                "text": current_chunk.strip(),
-                "chunk_index": chunk_index,
-                "document_id": document_id
-            })
+            chunks.append(current_chunk.strip())
+        
+        return chunks
+    
+    def _split_block(self, text: str, repeat_header: bool) -> List[str]:
+        # Oversized tables and code split between lines; table pieces repeat
+        # the header row so each still says what its columns are
+        text = text.strip()
+        if len(text) <= self.chunk_size:
+            return [text] if text else []
+        
+        lines = text.split("\n")
+        header: List[str] = []
+        if repeat_header:
+            header = lines[:2] if len(lines) > 1 and re.match(r'^\s*\|?\s*:?-{3,}', lines[1]) else lines[:1]
+            lines = lines[len(header):]
         
+        header_length = sum(len(line) + 1 for line in header)
+        chunks = []
+        current: List[str] = list(header)
+        current_length = header_length
+        for line in lines:
+            if current_length + len(line) > self.chunk_size and len(current) > len(header):
+                chunks.append("\n".join(current))
+                current = list(header)
+                current_length = header_length
+            current.append(line)
+            current_length += len(line) + 1
+        if len(current) > len(header):
+            chunks.append("\n".join(current))
         return chunks
     
     def _clean_text(self, text: str) -> str:
@@ -0,0 +1,46 @@
+from typing import List, Optional, Sequence
+import numpy as np # type: ignore
+
+
+def max_marginal_relevance(
+    query_embedding: Sequence[float],
+    embeddings: Sequence[Sequence[float]],
+    k: int,
+    lambda_mult: float = 0.5,
+    duplicate_threshold: Optional[float] = None
+) -> List[int]:
+    # Greedy MMR: each pick maximises
+    #   lambda * sim(query, c) - (1 - lambda) * max sim(c, already picked)
+    # lambda_mult=1 is plain relevance ranking, lower values favour diversity.
+    # Candidates at or above `duplicate_threshold` cosine similarity to a pick
+    # are dropped outright, so overlapping chunks of one page never both make it.
+    candidates = np.asarray(embeddings, dtype=np.float32)
+    if k <= 0 or candidates.size == 0:
+        return []
+
+    candidates = candidates / np.clip(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12, None)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+
+    best = int(np.argmax(relevance))
+    selected = [best]
+    redundancy = similarity[best].copy()
+    available = np.ones(len(candidates), dtype=bool)
+    available[best] = False
+    if duplicate_threshold is not None:
+        available &= similarity[best] < duplicate_threshold
+
+    while len(selected) < k and available.any():
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarity[best])
+        if duplicate_threshold is not None:
+            available &= similarity[best] < duplicate_threshold
+
+    return selected
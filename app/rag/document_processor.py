@@ -1,22 +1,33 @@
 from typing import List, Dict, Any
-import PyPDF2 # type: ignore
-import docx # type: ignore
 from pathlib import Path
+import re
 from app.core.exceptions import DocumentProcessingError
 
+# DOCX paragraph styles rendered as code blocks
+CODE_STYLE_PATTERN = re.compile(r"code|source|preformatted|macro", re.IGNORECASE)
+
 
 class DocumentProcessor:
+    # Extraction yields segments: {"kind", "text", "section"}. kind is one of
+    # heading, text, table or code; section is the heading path the segment
+    # sits under ("Methods > Sampling"), empty for formats without headings.
+    # PDF and plain text come out as one text segment per page.
     def __init__(self):
         self.supported_formats = {'.pdf', '.txt', '.docx', '.md'}
     
     def extract_text(self, file_path: str, file_type: str) -> str:
+        return join_segments(self.extract_segments(file_path, file_type))
+    
+    def extract_segments(self, file_path: str, file_type: str) -> List[Dict[str, Any]]:
         try:
             path = Path(file_path)
             
             if file_type == '.pdf':
-                return self._extract_from_pdf(path)
-            elif file_type == '.txt' or file_type == '.md':
-                return self._extract_from_text(path)
+                return [_segment("text", page) for page in self._extract_from_pdf(path)]
+            elif file_type == '.txt':
+                return [_segment("text", self._extract_from_text(path))]
+            elif file_type == '.md':
+                return self._extract_from_markdown(path)
             elif file_type == '.docx':
                 return self._extract_from_docx(path)
             else:
@@ -25,21 +36,137 @@ class DocumentProcessor:
         except Exception as e:
             raise DocumentProcessingError(f"Error extracting text: {str(e)}")
     
-    def _extract_from_pdf(self, path: Path) -> str:
-        text = ""
+    def _extract_from_pdf(self, path: Path) -> List[str]:
+        import PyPDF2 # type: ignore
+
         with open(path, 'rb') as file:
             pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-        return text.strip()
+            return [page.extract_text() for page in pdf_reader.pages]
     
     def _extract_from_text(self, path: Path) -> str:
         with open(path, 'r', encoding='utf-8') as file:
             return file.read()
     
-    def _extract_from_docx(self, path: Path) -> str:
+    def _extract_from_markdown(self, path: Path) -> List[Dict[str, Any]]:
+        from markdown_it import MarkdownIt # type: ignore
+        
+        source = self._extract_from_text(path)
+        lines = source.splitlines()
+        tokens = MarkdownIt("commonmark").enable("table").parse(source)
+        
+        segments = []
+        headings = _HeadingPath()
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            if token.type == "heading_open":
+                text = tokens[i + 1].content.strip()
+                headings.push(int(token.tag[1:]), text)
+                segments.append(_segment("heading", text, headings.path))
+                i += 3
+                continue
+            if token.type in ("fence", "code_block"):
+                segments.append(_segment("code", token.content.rstrip("\n"), headings.path))
+            elif token.type == "table_open":
+                # Keep the table as written: the pipes and header row carry meaning
+                start, end = token.map
+                segments.append(_segment("table", "\n".join(lines[start:end]).strip(), headings.path))
+                while tokens[i].type != "table_close":
+                    i += 1
+            elif token.type == "inline" and token.content.strip():
+                segments.append(_segment("text", token.content.strip(), headings.path))
+            elif token.type == "html_block" and token.content.strip():
+                segments.append(_segment("text", token.content.strip(), headings.path))
+            i += 1
+        return segments
+    
+    def _extract_from_docx(self, path: Path) -> List[Dict[str, Any]]:
+        import docx # type: ignore
+        from docx.table import Table # type: ignore
+        
         doc = docx.Document(path)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        return text.strip()
\ No newline at end of file
+        segments = []
+        headings = _HeadingPath()
+        code_lines: List[str] = []
+        
+        def flush_code():
+            if code_lines:
+                segments.append(_segment("code", "\n".join(code_lines), headings.path))
+                code_lines.clear()
+        
+        # Body order, so tables stay between the paragraphs around them
+        for block in doc.iter_inner_content():
+            if isinstance(block, Table):
+                flush_code()
+                rows = [_table_row(row) for row in block.rows]
+                text = "\n".join(row for row in rows if row.strip(" |"))
+                if text:
+                    segments.append(_segment("table", text, headings.path))
+                continue
+            
+            style = block.style.name if block.style is not None else ""
+            if CODE_STYLE_PATTERN.search(style):
+                code_lines.append(block.text)
+                continue
+            flush_code()
+            
+            text = block.text.strip()
+            if not text:
+                continue
+            level = _heading_level(style)
+            if level:
+                headings.push(level, text)
+                segments.append(_segment("heading", text, headings.path))
+            else:
+                segments.append(_segment("text", text, headings.path))
+        
+        flush_code()
+        return segments
+
+
+class _HeadingPath:
+    def __init__(self):
+        self._stack: List[tuple] = []
+
+    def push(self, level: int, text: str):
+        while self._stack and self._stack[-1][0] >= level:
+            self._stack.pop()
+        self._stack.append((level, text))
+
+    @property
+    def path(self) -> str:
+        return " > ".join(text for _, text in self._stack)
+
+
+def _segment(kind: str, text: str, section: str = "") -> Dict[str, Any]:
+    return {"kind": kind, "text": text, "section": section}
+
+
+def _heading_level(style: str) -> int:
+    if style == "Title":
+        return 1
+    match = re.fullmatch(r"Heading (\d)", style)
+    return int(match.group(1)) if match else 0
+
+
+def _table_row(row) -> str:
+    # Merged cells come back once per grid column they span; keep one copy
+    cells = []
+    for cell in row.cells:
+        text = " ".join(cell.text.split())
+        if not cells or cells[-1][0] is not cell._tc:
+            cells.append((cell._tc, text))
+    return " | ".join(text for _, text in cells)
+
+
+def join_segments(segments: List[Dict[str, Any]]) -> str:
+    return "\n".join(segment["text"] for segment in segments).strip()
+
+
+def extract_text(file_path: str, file_type: str) -> str:
+    # Module-level entry points so extraction can run in a process pool
+    return DocumentProcessor().extract_text(file_path, file_type)
+
+
+def extract_segments(file_path: str, file_type: str) -> List[Dict[str, Any]]:
+    return DocumentProcessor().extract_segments(file_path, file_type)
@@ -0,0 +1,273 @@
+from typing import List, Dict, Any, Callable, Deque, Optional, Tuple
+from collections import deque
+from pathlib import Path
+import asyncio
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from fastapi.concurrency import run_in_threadpool # type: ignore
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+embedding_batch_texts = registry.histogram(
+    "embedding_batch_texts",
+    "Texts encoded per model call by the embedding batcher",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+)
+embedding_batch_requests = registry.histogram(
+    "embedding_batch_requests",
+    "Encode requests merged into one model call by the embedding batcher",
+    buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+embedding_wait_seconds = registry.histogram(
+    "embedding_wait_seconds",
+    "Time encode requests waited in the batcher before their batch started"
+)
+
+
+class OnnxEmbedder:
+    # Runs a sentence-transformers model with onnxruntime on CPU. The model is
+    # exported once (and optionally int8-quantized) into ONNX_MODEL_DIR and
+    # reused on later starts; encode() mirrors SentenceTransformer.encode.
+    def __init__(self, model_name: str, quantize: bool = False, threads: int = 0):
+        import onnxruntime as ort # type: ignore
+        from transformers import AutoTokenizer # type: ignore
+
+        self.model_dir = Path(settings.ONNX_MODEL_DIR) / re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        # pooling.json is written last, so its presence marks a complete export
+        if not (self.model_dir / "pooling.json").exists():
+            self._export(model_name)
+
+        model_path = self.model_dir / "model.onnx"
+        if quantize:
+            model_path = self._quantize(model_path)
+
+        with open(self.model_dir / "pooling.json") as file:
+            self.config: Dict[str, Any] = json.load(file)
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(
+            str(model_path),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+
+    def encode(self, texts: List[str], batch_size: int = 32, **kwargs):
+        import numpy as np # type: ignore
+
+        if isinstance(texts, str):
+            texts = [texts]
+
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            encoded = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.config["max_seq_length"],
+                return_tensors="np"
+            )
+            feed = {name: encoded[name].astype(np.int64) for name in self.input_names if name in encoded}
+            hidden = self.session.run(None, feed)[0]
+            batches.append(self._pool(hidden, encoded["attention_mask"]))
+
+        if not batches:
+            return np.zeros((0, self.config["dimension"]), dtype=np.float32)
+        return np.concatenate(batches).astype(np.float32)
+
+    def _pool(self, hidden, attention_mask):
+        import numpy as np # type: ignore
+
+        if self.config["pooling"] == "cls":
+            pooled = hidden[:, 0]
+        else:
+            mask = attention_mask[..., None].astype(hidden.dtype)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.config["normalize"]:
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled
+
+    def _export(self, model_name: str):
+        # Export next to the final directory and move it into place in one step,
+        # so an interrupted export or a concurrent worker never sees half a model
+        self.model_dir.parent.mkdir(parents=True, exist_ok=True)
+        export_dir = Path(tempfile.mkdtemp(prefix=f".{self.model_dir.name}.", dir=self.model_dir.parent))
+        try:
+            self._export_to(model_name, export_dir)
+            if self.model_dir.exists() and not (self.model_dir / "pooling.json").exists():
+                shutil.rmtree(self.model_dir)
+            try:
+                os.replace(export_dir, self.model_dir)
+            except OSError:
+                # Another worker finished its export first; use that one
+                if not (self.model_dir / "pooling.json").exists():
+                    raise
+        finally:
+            shutil.rmtree(export_dir, ignore_errors=True)
+
+    def _export_to(self, model_name: str, export_dir: Path):
+        import torch # type: ignore
+        from sentence_transformers import SentenceTransformer # type: ignore
+
+        model = SentenceTransformer(model_name, device="cpu")
+        transformer = model[0].auto_model.eval()
+        tokenizer = model.tokenizer
+
+        pooling = "mean"
+        normalize = False
+        for module in model:
+            if getattr(module, "pooling_mode_cls_token", False):
+                pooling = "cls"
+            if type(module).__name__ == "Normalize":
+                normalize = True
+
+        sample = tokenizer(["export sample"], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+        with torch.no_grad():
+            torch.onnx.export(
+                transformer,
+                tuple(sample[name] for name in input_names),
+                str(export_dir / "model.onnx"),
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=17
+            )
+
+        tokenizer.save_pretrained(export_dir)
+        with open(export_dir / "pooling.json", "w") as file:
+            json.dump({
+                "pooling": pooling,
+                "normalize": normalize,
+                "max_seq_length": model.max_seq_length,
+                "dimension": model.get_sentence_embedding_dimension()
+            }, file)
+
+    def _quantize(self, model_path: Path) -> Path:
+        quantized_path = model_path.with_name("model.int8.onnx")
+        if not quantized_path.exists():
+            from onnxruntime.quantization import QuantType, quantize_dynamic # type: ignore
+
+            partial_path = quantized_path.with_name(f".{quantized_path.name}.{os.getpid()}")
+            quantize_dynamic(str(model_path), str(partial_path), weight_type=QuantType.QInt8)
+            os.replace(partial_path, quantized_path)
+        return quantized_path
+
+
+def load_embedding_model(model_name: str, backend: str, quantize: bool = False, threads: int = 0):
+    if backend == "onnx":
+        return OnnxEmbedder(model_name, quantize=quantize, threads=threads)
+
+    import torch # type: ignore
+    from sentence_transformers import SentenceTransformer # type: ignore
+
+    if threads:
+        torch.set_num_threads(threads)
+    return SentenceTransformer(model_name, device="cpu")
+
+
+class EmbeddingBatcher:
+    # Merges concurrent encode requests (single queries as well as ingest
+    # chunks) into one model call. A request waits at most `window` seconds for
+    # company, or until `max_batch` texts are queued; while a batch runs, new
+    # requests queue up and go out together as soon as it finishes. Bulk
+    # (ingest) requests are split into `max_batch` parts on a queue of their
+    # own: each batch takes the pending queries first and at most one bulk
+    # part, so a big ingest job cannot hold a query back for more than one batch.
+    def __init__(self, get_model: Callable[[], Any], window: float, max_batch: int):
+        self.get_model = get_model
+        self.window = window
+        self.max_batch = max_batch
+        self._queries: Deque[Tuple[List[str], asyncio.Future, float]] = deque()
+        self._bulk: Deque[Tuple[List[str], asyncio.Future, float]] = deque()
+        self._pending_texts = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def encode(self, texts: List[str], bulk: bool = False) -> List[List[float]]:
+        if not texts:
+            return []
+        if self.window <= 0:
+            return await run_in_threadpool(self._encode, texts)
+
+        queue = self._bulk if bulk else self._queries
+        futures = [
+            self._enqueue(texts[start:start + self.max_batch], queue)
+            for start in range(0, len(texts), self.max_batch)
+        ]
+        parts = await asyncio.gather(*futures)
+        return [embedding for part in parts for embedding in part]
+
+    def _enqueue(self, texts: List[str], queue: Deque) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        queue.append((texts, future, time.perf_counter()))
+        self._pending_texts += len(texts)
+
+        if self._pending_texts >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        return future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._task is not None or not (self._queries or self._bulk):
+            # The running batch flushes again when it finishes
+            return
+
+        batch = []
+        size = 0
+        while self._queries and (not batch or size + len(self._queries[0][0]) <= self.max_batch):
+            request = self._queries.popleft()
+            batch.append(request)
+            size += len(request[0])
+        if self._bulk and (not batch or size + len(self._bulk[0][0]) <= self.max_batch):
+            request = self._bulk.popleft()
+            batch.append(request)
+            size += len(request[0])
+        self._pending_texts -= size
+
+        self._task = asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[List[str], asyncio.Future, float]]):
+        started = time.perf_counter()
+        texts = [text for request_texts, _, _ in batch for text in request_texts]
+        try:
+            for _, _, queued_at in batch:
+                embedding_wait_seconds.observe(started - queued_at)
+            embedding_batch_texts.observe(len(texts))
+            embedding_batch_requests.observe(len(batch))
+
+            embeddings = await run_in_threadpool(self._encode, texts)
+            offset = 0
+            for request_texts, future, _ in batch:
+                if not future.done():
+                    future.set_result(embeddings[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._task = None
+            if self._queries or self._bulk:
+                self._flush()
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        return self.get_model().encode(texts, batch_size=settings.EMBEDDING_BATCH_SIZE).tolist()
@@ -0,0 +1,67 @@
+from typing import List, Sequence, Optional
+import re
+import numpy as np # type: ignore
+
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in re.split(r'(?<=[.!?])\s+', text) if sentence.strip()]
+
+
+def extractive_summary(
+    chunks: Sequence[str],
+    embeddings: Optional[Sequence[Sequence[float]]] = None,
+    max_sentences: int = 5,
+    redundancy_threshold: float = 0.7
+) -> str:
+    # Picks the sentences closest to the document's TF-IDF centroid, weighted by
+    # how central their chunk's embedding is, skipping near-repeats, and returns
+    # them in reading order. Costs milliseconds, so ingestion never waits on the LLM.
+    from sklearn.feature_extraction.text import TfidfVectorizer # type: ignore
+
+    # Chunks overlap; keep each sentence once, remembering its best chunk weight
+    weights = _chunk_centrality(embeddings) if embeddings is not None and len(embeddings) else None
+    sentences: List[str] = []
+    sentence_weights = {}
+    for chunk_index, chunk in enumerate(chunks):
+        weight = 1.0 if weights is None else float(weights[chunk_index])
+        for sentence in split_sentences(chunk):
+            if len(sentence) < 20:
+                continue
+            if sentence not in sentence_weights:
+                sentences.append(sentence)
+                sentence_weights[sentence] = weight
+            else:
+                sentence_weights[sentence] = max(sentence_weights[sentence], weight)
+
+    if len(sentences) <= max_sentences:
+        return " ".join(sentences)
+
+    try:
+        matrix = TfidfVectorizer(stop_words="english", sublinear_tf=True).fit_transform(sentences)
+    except ValueError:
+        # Nothing but stop words
+        return " ".join(sentences[:max_sentences])
+
+    centroid = np.asarray(matrix.mean(axis=0)).ravel()
+    centroid /= max(float(np.linalg.norm(centroid)), 1e-12)
+    scores = (matrix @ centroid) * np.array([sentence_weights[sentence] for sentence in sentences])
+
+    selected: List[int] = []
+    for index in np.argsort(-scores):
+        if len(selected) == max_sentences:
+            break
+        # TF-IDF rows are L2-normalised, so the dot product is the cosine
+        if selected and (matrix[selected] @ matrix[index].T).max() > redundancy_threshold:
+            continue
+        selected.append(int(index))
+
+    return " ".join(sentences[i] for i in sorted(selected))
+
+
+def _chunk_centrality(embeddings: Sequence[Sequence[float]]):
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+    centroid = vectors.mean(axis=0)
+    centroid /= max(float(np.linalg.norm(centroid)), 1e-12)
+    # Map cosine from [-1, 1] to [0, 1] so weights stay non-negative
+    return (vectors @ centroid + 1) / 2
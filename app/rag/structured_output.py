@@ -0,0 +1,89 @@
+from typing import List, Dict, Any, Optional, Iterator
+import json
+
+_decoder = json.JSONDecoder()
+
+
+def iter_json_objects(text: str) -> Iterator[Dict[str, Any]]:
+    # Yield every complete JSON object in text, skipping prose and truncated tails.
+    # When an outer object is cut off, scanning resumes inside it so its complete
+    # children (e.g. individual questions) are still recovered.
+    position = text.find("{")
+    while position != -1:
+        try:
+            obj, end = _decoder.raw_decode(text, position)
+        except json.JSONDecodeError:
+            position = text.find("{", position + 1)
+            continue
+
+        if isinstance(obj, dict):
+            yield obj
+        position = text.find("{", end)
+
+
+def parse_quiz_questions(text: str) -> List[Dict[str, Any]]:
+    questions = []
+    seen = set()
+
+    for obj in iter_json_objects(text):
+        candidates = obj.get("questions") if isinstance(obj.get("questions"), list) else [obj]
+        for candidate in candidates:
+            question = normalize_question(candidate)
+            if question is None:
+                continue
+
+            key = question["question"].strip().lower()
+            if key not in seen:
+                seen.add(key)
+                questions.append(question)
+
+    return questions
+
+
+def normalize_question(candidate: Any) -> Optional[Dict[str, Any]]:
+    if not isinstance(candidate, dict):
+        return None
+
+    text = candidate.get("question")
+    options = candidate.get("options")
+    if not isinstance(text, str) or not text.strip():
+        return None
+    if not isinstance(options, list) or len(options) < 2:
+        return None
+    if not all(isinstance(option, (str, int, float)) for option in options):
+        return None
+    options = [str(option) for option in options]
+
+    correct_answer = _answer_index(candidate.get("correct_answer"), options)
+    if correct_answer is None:
+        return None
+
+    explanation = candidate.get("explanation")
+    return {
+        "question": text.strip(),
+        "options": options,
+        "correct_answer": correct_answer,
+        "explanation": explanation if isinstance(explanation, str) else ""
+    }
+
+
+def _answer_index(answer: Any, options: List[str]) -> Optional[int]:
+    # Models answer with an index, a letter ("B") or the option text itself
+    if isinstance(answer, bool):
+        return None
+    if isinstance(answer, int):
+        return answer if 0 <= answer < len(options) else None
+    if not isinstance(answer, str):
+        return None
+
+    # Option text first: an option can itself be "2" or "B"
+    answer = answer.strip()
+    for index, option in enumerate(options):
+        if option.strip().lower() == answer.lower():
+            return index
+    if answer.isdigit():
+        return _answer_index(int(answer), options)
+    if len(answer) == 1 and answer.isalpha():
+        index = ord(answer.upper()) - ord("A")
+        return index if 0 <= index < len(options) else None
+    return None
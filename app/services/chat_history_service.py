@@ -0,0 +1,110 @@
+from typing import List, Dict, Set, Tuple, Optional
+import logging
+from sqlalchemy.orm import Session # type: ignore
+
+from app.models.chat import ChatSession, ChatMessage
+from app.services.llm_service import LLMService
+from app.core.config import settings
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English text; close enough for budgeting
+    return len(text) // 4 + 1
+
+
+class ChatHistoryService:
+    def __init__(self, llm_service: LLMService = None):
+        self.llm_service = llm_service or LLMService()
+        self._folding: Set[int] = set()
+
+    def load_history(
+        self,
+        session: ChatSession,
+        db: Session
+    ) -> Tuple[Optional[str], List[Dict[str, str]], bool]:
+        # Returns the summary, the recent turns and whether older turns are due
+        # to be folded into the summary. Folding makes an LLM call, so callers
+        # run fold_summary after responding; until it lands the previous
+        # summary stands in for the overflow turns.
+        overflow, recent = self._split(session, db)
+        fold_due = len(overflow) >= settings.CHAT_SUMMARY_BATCH_TURNS * 2
+        if not fold_due:
+            recent = overflow + recent
+
+        summary, messages = self._fit_budget(session.summary, [self._as_message(row) for row in recent])
+        return summary, messages, fold_due
+
+    async def fold_summary(self, session_id: int):
+        # One fold per session at a time; a later turn picks up whatever is left
+        if session_id in self._folding:
+            return
+        self._folding.add(session_id)
+        db = SessionLocal()
+        try:
+            session = db.query(ChatSession).filter(ChatSession.id == session_id).first()
+            if session is None:
+                return
+            overflow, _ = self._split(session, db)
+            if len(overflow) < settings.CHAT_SUMMARY_BATCH_TURNS * 2:
+                return
+            session.summary = await self.llm_service.summarize_conversation(
+                session.summary,
+                [self._as_message(row) for row in overflow],
+                settings.CHAT_SUMMARY_TOKEN_BUDGET,
+                session.user_id
+            )
+            session.summarized_until_id = overflow[-1].id
+            db.commit()
+        except Exception:
+            logger.exception("Summarizing chat session %s failed", session_id)
+        finally:
+            db.close()
+            self._folding.discard(session_id)
+
+    def _split(self, session: ChatSession, db: Session) -> Tuple[List[ChatMessage], List[ChatMessage]]:
+        window = settings.CHAT_HISTORY_TURNS * 2
+        batch = settings.CHAT_SUMMARY_BATCH_TURNS * 2
+
+        # One query on (session_id, id): the recent window plus any turns not yet summarized
+        rows = db.query(ChatMessage).filter(
+            ChatMessage.session_id == session.id,
+            ChatMessage.id > (session.summarized_until_id or 0)
+        ).order_by(ChatMessage.id.desc()).limit(window + batch).all()
+        rows.reverse()
+
+        overflow = rows[:-window] if len(rows) > window else []
+        return overflow, rows[len(overflow):]
+
+    def _fit_budget(
+        self,
+        summary: Optional[str],
+        messages: List[Dict[str, str]]
+    ) -> Tuple[Optional[str], List[Dict[str, str]]]:
+        budget = settings.CHAT_HISTORY_TOKEN_BUDGET
+
+        if summary:
+            max_chars = settings.CHAT_SUMMARY_TOKEN_BUDGET * 4
+            summary = summary[:max_chars]
+            budget -= estimate_tokens(summary)
+
+        # Keep the newest messages that fit
+        kept = []
+        for message in reversed(messages):
+            cost = estimate_tokens(message["content"])
+            if cost > budget:
+                break
+            kept.append(message)
+            budget -= cost
+        kept.reverse()
+
+        # Never start the window on an orphaned assistant reply
+        if kept and kept[0]["role"] == "assistant":
+            kept = kept[1:]
+
+        return summary, kept
+
+    def _as_message(self, row: ChatMessage) -> Dict[str, str]:
+        return {"role": row.role, "content": row.content}
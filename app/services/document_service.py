@@ -1,17 +1,24 @@
-from typing import List, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import os
-import shutil
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from sqlalchemy.orm import Session # type: ignore
 from fastapi import UploadFile # type: ignore
+from fastapi.concurrency import run_in_threadpool # type: ignore
 
 from app.models.document import Document, DocumentChunk
-from app.rag.document_processor import DocumentProcessor
+from app.rag.document_processor import DocumentProcessor, extract_segments, join_segments
 from app.rag.chunking import TextChunker
 from app.services.vector_store_service import VectorStoreService
-from app.services.llm_service import LLMService
+from app.services.upload_service import UploadService
+from app.services.extraction_cache import ExtractionCache
+from app.services.summary_service import get_summary_service
+from app.rag.extractive_summary import extractive_summary
 from app.core.config import settings
-from app.core.exceptions import DocumentProcessingError
+from app.core.exceptions import DocumentProcessingError, UploadTooLargeError
+from app.core.telemetry import stage_timer
+from app.core.profiling import run_in_process, trace_allocations
 
 
 class DocumentService:
@@ -19,7 +26,10 @@ class DocumentService:
         self.processor = DocumentProcessor()
         self.chunker = TextChunker()
         self.vector_store = VectorStoreService()
-        self.llm_service = LLMService()
+        self.uploads = UploadService()
+        self.cache = ExtractionCache()
+        self.summaries = get_summary_service()
+        self._extraction_pool = None
     
     async def upload_document(
         self,
@@ -29,46 +39,116 @@ class DocumentService:
     ) -> Document:
         try:
             # Validate file
-            file_extension = Path(file.filename).suffix.lower()
-            if file_extension not in settings.ALLOWED_FILE_TYPES:
-                raise DocumentProcessingError(f"File type {file_extension} not supported")
-            
-            # Create upload directory if it doesn't exist
-            upload_dir = Path(settings.UPLOAD_DIR)
-            upload_dir.mkdir(exist_ok=True)
-            
-            # Save file
-            file_path = upload_dir / f"{user_id}_{file.filename}"
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            
-            # Create document record
-            document = Document(
-                title=file.filename,
-                filename=file.filename,
-                file_path=str(file_path),
-                file_type=file_extension,
-                file_size=file_path.stat().st_size,
-                owner_id=user_id,
-                processing_status="pending"
-            )
+            filename, file_extension = self.uploads.validate_filename(file.filename)
             
-            db.add(document)
-            db.commit()
-            db.refresh(document)
+            # Stream file to disk off the event loop, hashing as it is written
+            file_path = self.uploads.destination_for(filename, user_id)
+            file_size, content_hash = await self.uploads.save_upload(file, file_path)
+            
+            document = self._create_document(
+                filename, file_extension, file_path, file_size, content_hash, user_id, db
+            )
             
             # Process document asynchronously (in a real app, use Celery)
-            await self.process_document(document.id, db)
+            with trace_allocations("ingest", document.id):
+                await self.process_document(document.id, db)
             
             return document
             
+        except UploadTooLargeError:
+            raise
         except Exception as e:
             raise DocumentProcessingError(f"Error uploading document: {str(e)}")
     
+    async def complete_chunked_upload(
+        self,
+        upload_id: str,
+        user_id: int,
+        db: Session
+    ) -> Document:
+        try:
+            file_path, filename, file_size, content_hash = await self.uploads.complete_upload(upload_id, user_id)
+            
+            document = self._create_document(
+                filename, file_path.suffix.lower(), file_path, file_size, content_hash, user_id, db
+            )
+            
+            with trace_allocations("ingest", document.id):
+                await self.process_document(document.id, db)
+            
+            return document
+            
+        except Exception as e:
+            raise DocumentProcessingError(f"Error uploading document: {str(e)}")
+    
+    def _create_document(
+        self,
+        filename: str,
+        file_extension: str,
+        file_path: Path,
+        file_size: int,
+        content_hash: str,
+        user_id: int,
+        db: Session
+    ) -> Document:
+        document = Document(
+            title=filename,
+            filename=filename,
+            file_path=str(file_path),
+            file_type=file_extension,
+            file_size=file_size,
+            content_hash=content_hash,
+            owner_id=user_id,
+            processing_status="pending"
+        )
+        
+        db.add(document)
+        db.commit()
+        db.refresh(document)
+        
+        return document
+    
+    async def upload_documents(
+        self,
+        files: List[UploadFile],
+        user_id: int,
+        db: Session
+    ) -> List[Dict[str, Any]]:
+        results = []
+        documents = []
+        
+        # Save every file first; a bad file only fails its own entry
+        for file in files:
+            try:
+                filename, file_extension = self.uploads.validate_filename(file.filename)
+                file_path = self.uploads.destination_for(filename, user_id)
+                file_size, content_hash = await self.uploads.save_upload(file, file_path)
+                
+                document = self._create_document(
+                    filename, file_extension, file_path, file_size, content_hash, user_id, db
+                )
+                documents.append(document)
+                results.append({"filename": filename, "document_id": document.id})
+                
+            except DocumentProcessingError as e:
+                results.append({
+                    "filename": file.filename,
+                    "document_id": None,
+                    "status": "failed",
+                    "error": e.message
+                })
+        
+        with trace_allocations("batch_ingest"):
+            statuses = await self.process_documents([document.id for document in documents], db)
+        for result in results:
+            if result["document_id"] is not None:
+                result.update(statuses[result["document_id"]])
+        
+        return results
+    
     async def process_document(self, document_id: int, db: Session) -> bool:
+        document = None
         try:
-
-
             document = db.query(Document).filter(Document.id == document_id).first()
             if not document:
                 raise DocumentProcessingError("Document not found")
@@ -77,62 +157,269 @@ class DocumentService:
             document.processing_status = "processing"
             db.commit()
             
-            # Extract text
-            text_content = self.processor.extract_text(
-                document.file_path,
-                document.file_type
-            )
+            # Extract section-tagged text
+            with stage_timer("ingest", "extract"):
+                segments = await self._extract_segments(document)
+            text_content = join_segments(segments)
 
             if not text_content.strip():
                 document.processing_status = "failed"
                 db.commit()
                 raise DocumentProcessingError("Extracted document content is empty. Cannot proceed.")
             
-            # Generate summary
-            summary = await self.llm_service.generate_summary(text_content)
-            
-            # Update document with content and summary
             document.content = text_content
-            document.summary = summary
             
-            # Chunk the document
-            chunks = self.chunker.chunk_text(text_content, document_id)
+            # Chunk the document and save chunks to database
+            with stage_timer("ingest", "chunk"):
+                chunk_rows, vector_docs = await self._build_chunks(document, segments)
+            db.add_all(chunk_rows)
+            
+            embeddings = await self._embed_chunks([(document, vector_docs)])
             
-            # Save chunks to database
-            for chunk_data in chunks:
-                chunk = DocumentChunk(
-                    document_id=document_id,
-                    chunk_text=chunk_data["text"],
-                    chunk_index=chunk_data["chunk_index"]
+            # Extractive summary from the chunk embeddings; the LLM one comes later
+            with stage_timer("ingest", "summarize"):
+                document.summary, document.summary_type = await self._summarize(
+                    document, vector_docs, embeddings
                 )
-                db.add(chunk)
             
             # Add to vector store
-            vector_docs = []
-            for chunk_data in chunks:
-                vector_docs.append({
-                    "content": chunk_data["text"],
-                    "document_id": document_id,
-                    "title": document.title,
-                    "chunk_index": chunk_data["chunk_index"]
-                })
-            
-            await self.vector_store.add_documents(vector_docs, document.owner_id)
+            await self.vector_store.add_documents(vector_docs, document.owner_id, embeddings)
             
             # Update processing status
             document.is_processed = True
             document.processing_status = "completed"
             
-            db.commit()
+            with stage_timer("ingest", "commit"):
+                db.commit()
+            
+            if document.summary_type == "extractive":
+                self.summaries.enqueue(document.id)
             return True
             
         except Exception as e:
-            # Update status to failed
+            # Drop partial work (e.g. chunk rows) and update status to failed;
+            # checkpoints in the extraction cache survive for the retry
+            db.rollback()
             if document:
                 document.processing_status = "failed"
                 db.commit()
             raise DocumentProcessingError(f"Error processing document: {str(e)}")
     
+    async def reprocess_document(self, document_id: int, user_id: int, db: Session) -> Optional[Document]:
+        # Retry a failed ingest. Stages checkpointed in the extraction cache are
+        # not repeated, so this usually resumes where the failure happened.
+        document = db.query(Document).filter(
+            Document.id == document_id,
+            Document.owner_id == user_id
+        ).first()
+        if not document:
+            return None
+        if document.processing_status == "processing":
+            raise DocumentProcessingError("Document is already being processed")
+        
+        # Clear whatever the failed attempt left behind
+        await self.vector_store.delete_document_vectors([document.id])
+        db.query(DocumentChunk).filter(DocumentChunk.document_id == document.id).delete()
+        document.is_processed = False
+        db.commit()
+        
+        with trace_allocations("ingest", document.id):
+            await self.process_document(document.id, db)
+        
+        db.refresh(document)
+        return document
+    
+    async def process_documents(
+        self,
+        document_ids: List[int],
+        db: Session
+    ) -> Dict[int, Dict[str, Any]]:
+        # Batch variant of process_document: extraction runs in parallel and all
+        # chunks share one embedding pass, one vector store write and one insert.
+        statuses = {}
+        if not document_ids:
+            return statuses
+        
+        documents = db.query(Document).filter(Document.id.in_(document_ids)).all()
+        for document in documents:
+            document.processing_status = "processing"
+        db.commit()
+        
+        def fail(document: Document, error: str):
+            document.processing_status = "failed"
+            statuses[document.id] = {"status": "failed", "error": error}
+        
+        # Extract text in parallel, across the extraction process pool
+        with stage_timer("batch_ingest", "extract"):
+            extracted = await asyncio.gather(
+                *(self._extract_segments(document) for document in documents),
+                return_exceptions=True
+            )
+        
+        ready = []
+        for document, segments in zip(documents, extracted):
+            if isinstance(segments, Exception):
+                fail(document, str(segments))
+            elif not join_segments(segments).strip():
+                fail(document, "Extracted document content is empty. Cannot proceed.")
+            else:
+                ready.append((document, segments))
+        
+        chunk_rows = []
+        vector_docs_by_document = []
+        processed = []
+        for document, segments in ready:
+            document.content = join_segments(segments)
+            
+            try:
+                rows, vector_docs = await self._build_chunks(document, segments)
+            except Exception as e:
+                fail(document, f"Error chunking document: {str(e)}")
+                continue
+            chunk_rows.extend(rows)
+            vector_docs_by_document.append((document, vector_docs))
+            processed.append(document)
+        
+        # Persist per-document failures before the shared write
+        db.commit()
+        
+        try:
+            # Pool every document's uncached chunks into shared embedding batches
+            embeddings = await self._embed_chunks(vector_docs_by_document)
+            
+            by_owner = {}
+            offset = 0
+            with stage_timer("batch_ingest", "summarize"):
+                for document, vector_docs in vector_docs_by_document:
+                    document_embeddings = embeddings[offset:offset + len(vector_docs)]
+                    offset += len(vector_docs)
+                    
+                    document.summary, document.summary_type = await self._summarize(
+                        document, vector_docs, document_embeddings
+                    )
+                    owner_docs, owner_embeddings = by_owner.setdefault(document.owner_id, ([], []))
+                    owner_docs.extend(vector_docs)
+                    owner_embeddings.extend(document_embeddings)
+            
+            for owner_id, (vector_docs, owner_embeddings) in by_owner.items():
+                await self.vector_store.add_documents(vector_docs, owner_id, owner_embeddings)
+            
+            db.add_all(chunk_rows)
+            for document in processed:
+                document.is_processed = True
+                document.processing_status = "completed"
+                statuses[document.id] = {"status": "completed", "error": None}
+            db.commit()
+            
+            for document in processed:
+                if document.summary_type == "extractive":
+                    self.summaries.enqueue(document.id)
+            
+        except Exception as e:
+            db.rollback()
+            for document in processed:
+                fail(document, f"Error processing document: {str(e)}")
+            db.commit()
+        
+        return statuses
+    
+    async def _extract_segments(self, document: Document) -> List[Dict[str, Any]]:
+        segments = await run_in_threadpool(self.cache.load_segments, document.content_hash)
+        if segments is None:
+            segments = await run_in_process(
+                self._get_extraction_pool(),
+                extract_segments,
+                document.file_path,
+                document.file_type
+            )
+            await run_in_threadpool(self.cache.save_segments, document.content_hash, segments)
+        
+        return segments
+    
+    async def _summarize(
+        self,
+        document: Document,
+        vector_docs: List[Dict[str, Any]],
+        embeddings: List[List[float]]
+    ) -> Tuple[str, str]:
+        # An LLM summary of the same file from an earlier upload beats an extractive one
+        summary = await run_in_threadpool(self.cache.load_summary, document.content_hash)
+        if summary is not None:
+            return summary, "llm"
+        
+        summary = await run_in_threadpool(
+            extractive_summary,
+            [doc["content"] for doc in vector_docs],
+            embeddings,
+            settings.SUMMARY_EXTRACTIVE_SENTENCES
+        )
+        return summary, "extractive"
+    
+    async def _embed_chunks(
+        self,
+        vector_docs_by_document: List[Tuple[Document, List[Dict[str, Any]]]]
+    ) -> List[List[float]]:
+        # Embeddings for every chunk, in order; cached documents skip the model
+        # and the rest are encoded together, then checkpointed per document
+        cached = []
+        missing_texts = []
+        for document, vector_docs in vector_docs_by_document:
+            embeddings = await run_in_threadpool(self.cache.load_embeddings, document.content_hash)
+            if embeddings is not None and len(embeddings) != len(vector_docs):
+                embeddings = None
+            if embeddings is None:
+                missing_texts.extend(doc["content"] for doc in vector_docs)
+            cached.append(embeddings)
+        
+        encoded = await self.vector_store.embed_documents(missing_texts) if missing_texts else []
+        
+        result = []
+        offset = 0
+        for (document, vector_docs), embeddings in zip(vector_docs_by_document, cached):
+            if embeddings is None:
+                embeddings = encoded[offset:offset + len(vector_docs)]
+                offset += len(vector_docs)
+                await run_in_threadpool(self.cache.save_embeddings, document.content_hash, embeddings)
+            result.extend(embeddings)
+        return result
+    
+    def _get_extraction_pool(self) -> ProcessPoolExecutor:
+        if self._extraction_pool is None:
+            self._extraction_pool = ProcessPoolExecutor(max_workers=settings.EXTRACTION_WORKERS)
+        return self._extraction_pool
+    
+    async def _build_chunks(
+        self,
+        document: Document,
+        segments: List[Dict[str, Any]]
+    ) -> Tuple[List[DocumentChunk], List[Dict[str, Any]]]:
+        chunks = await run_in_threadpool(self.cache.load_chunks, document.content_hash)
+        if chunks is None:
+            chunks = self.chunker.chunk_segments(segments, document.id)
+            await run_in_threadpool(self.cache.save_chunks, document.content_hash, chunks)
+        
+        chunk_rows = []
+        vector_docs = []
+        for chunk_data in chunks:
+            chunk_rows.append(DocumentChunk(
+                document_id=document.id,
+                chunk_text=chunk_data["text"],
+                chunk_index=chunk_data["chunk_index"],
+                section=chunk_data["section"] or None,
+                embedding_id=VectorStoreService.vector_id(
+                    document.owner_id, document.id, chunk_data["chunk_index"]
+                )
+            ))
+            vector_docs.append({
+                "content": chunk_data["text"],
+                "document_id": document.id,
+                "title": document.title,
+                "chunk_index": chunk_data["chunk_index"],
+                "section": chunk_data["section"]
+            })
+        
+        return chunk_rows, vector_docs
+    
     def get_user_documents(
         self,
         user_id: int,
@@ -144,7 +431,7 @@ class DocumentService:
             Document.owner_id == user_id
         ).offset(skip).limit(limit).all()
     
-    def delete_document(self, document_id: int, user_id: int, db: Session) -> bool:
+    async def delete_document(self, document_id: int, user_id: int, db: Session) -> bool:
         try:
             document = db.query(Document).filter(
                 Document.id == document_id,
@@ -154,15 +441,58 @@ class DocumentService:
             if not document:
                 return False
             
+            # Delete vectors
+            await self.vector_store.delete_document_vectors([document.id])
+            
             # Delete file
-            if os.path.exists(document.file_path):
-                os.remove(document.file_path)
+            await run_in_threadpool(self._remove_files, [document.file_path])
             
             # Delete from database (cascades to chunks)
+            content_hash = document.content_hash
             db.delete(document)
             db.commit()
             
+            await self._drop_cache_entries([content_hash], db)
             return True
             
         except Exception as e:
-            raise DocumentProcessingError(f"Error deleting document: {str(e)}")
\ No newline at end of file
+            raise DocumentProcessingError(f"Error deleting document: {str(e)}")
+    
+    async def delete_user_documents(self, user_id: int, db: Session) -> int:
+        try:
+            documents = db.query(Document).filter(Document.owner_id == user_id).all()
+            content_hashes = [document.content_hash for document in documents]
+            
+            # Delete every vector owned by the user in one call
+            await self.vector_store.delete_user_documents(user_id)
+            
+            # One threadpool hop for all files rather than blocking the loop per document
+            await run_in_threadpool(self._remove_files, [document.file_path for document in documents])
+            for document in documents:
+                db.delete(document)
+            db.commit()
+            
+            await self._drop_cache_entries(content_hashes, db)
+            return len(documents)
+            
+        except Exception as e:
+            raise DocumentProcessingError(f"Error deleting user documents: {str(e)}")
+    
+    def _remove_files(self, paths: List[str]):
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+    
+    async def _drop_cache_entries(self, content_hashes: List[Optional[str]], db: Session):
+        # Checkpoints are shared by identical files; keep those still referenced
+        content_hashes = {content_hash for content_hash in content_hashes if content_hash}
+        if not content_hashes:
+            return
+        
+        still_used = {
+            content_hash for (content_hash,) in db.query(Document.content_hash).filter(
+                Document.content_hash.in_(content_hashes)
+            ).distinct()
+        }
+        for content_hash in content_hashes - still_used:
+            await run_in_threadpool(self.cache.delete, content_hash)
\ No newline at end of file
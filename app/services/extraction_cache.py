@@ -0,0 +1,125 @@
+from typing import List, Dict, Any, Optional
+from pathlib import Path
+import json
+import os
+import re
+import shutil
+import zlib
+
+from app.core.config import settings
+
+
+class ExtractionCache:
+    # Checkpoints of each ingestion stage on disk, keyed by the file's SHA-256,
+    # so a failed or repeated ingest resumes after the last completed stage:
+    #
+    #   <root>/ab/abcdef.../segments.json.z                  extracted, section-tagged text
+    #   <root>/ab/abcdef.../summary-<llm model>.json.z
+    #   <root>/ab/abcdef.../chunks-<size>-<overlap>.json.z
+    #   <root>/ab/abcdef.../embeddings-<model>-<backend>-<chunking>.npy
+    #
+    # Artifact names carry the settings they depend on, so changing the chunk
+    # size or the embedding model misses the cache instead of reusing stale data.
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or settings.EXTRACTION_CACHE_DIR)
+        self.enabled = settings.EXTRACTION_CACHE_ENABLED
+
+    def load_segments(self, content_hash: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        return self._load_json(content_hash, "segments.json.z")
+
+    def save_segments(self, content_hash: Optional[str], segments: List[Dict[str, Any]]):
+        self._save_json(content_hash, "segments.json.z", segments)
+
+    def load_summary(self, content_hash: Optional[str]) -> Optional[str]:
+        return self._load_json(content_hash, self._summary_name())
+
+    def save_summary(self, content_hash: Optional[str], summary: str):
+        self._save_json(content_hash, self._summary_name(), summary)
+
+    def load_chunks(self, content_hash: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        return self._load_json(content_hash, f"{self._chunking()}.json.z")
+
+    def save_chunks(self, content_hash: Optional[str], chunks: List[Dict[str, Any]]):
+        self._save_json(content_hash, f"{self._chunking()}.json.z", [
+            {"text": chunk["text"], "chunk_index": chunk["chunk_index"], "section": chunk.get("section", "")}
+            for chunk in chunks
+        ])
+
+    def load_embeddings(self, content_hash: Optional[str]) -> Optional[List[List[float]]]:
+        path = self._path(content_hash, self._embeddings_name())
+        if path is None or not path.exists():
+            return None
+
+        import numpy as np # type: ignore
+
+        try:
+            return np.load(path).tolist()
+        except (OSError, ValueError):
+            return None
+
+    def save_embeddings(self, content_hash: Optional[str], embeddings: List[List[float]]):
+        path = self._path(content_hash, self._embeddings_name())
+        if path is None:
+            return
+
+        import numpy as np # type: ignore
+
+        def write(file):
+            np.save(file, np.asarray(embeddings, dtype=np.float32))
+
+        self._write_atomic(path, write)
+
+    def delete(self, content_hash: Optional[str]):
+        if content_hash:
+            shutil.rmtree(self.root / content_hash[:2] / content_hash, ignore_errors=True)
+
+    def _load_json(self, content_hash: Optional[str], name: str):
+        path = self._path(content_hash, name)
+        if path is None or not path.exists():
+            return None
+        try:
+            return json.loads(zlib.decompress(path.read_bytes()))
+        except (OSError, ValueError, zlib.error):
+            # A corrupt checkpoint is treated as missing and rewritten
+            return None
+
+    def _save_json(self, content_hash: Optional[str], name: str, value: Any):
+        path = self._path(content_hash, name)
+        if path is None:
+            return
+
+        data = zlib.compress(json.dumps(value).encode("utf-8"), 6)
+        self._write_atomic(path, lambda file: file.write(data))
+
+    def _write_atomic(self, path: Path, write):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(temp_path, "wb") as file:
+            write(file)
+        os.replace(temp_path, path)
+
+    def _path(self, content_hash: Optional[str], name: str) -> Optional[Path]:
+        if not self.enabled or not content_hash:
+            return None
+        return self.root / content_hash[:2] / content_hash / name
+
+    def _summary_name(self) -> str:
+        return f"summary-{self._safe(settings.LLM_MODEL)}.json.z"
+
+    def _chunking(self) -> str:
+        # v2: chunks follow section boundaries and carry their section path
+        return f"chunks-v2-{settings.CHUNK_SIZE}-{settings.CHUNK_OVERLAP}"
+
+    def _embeddings_name(self) -> str:
+        backend = settings.EMBEDDING_BACKEND
+        if backend == "onnx" and settings.EMBEDDING_ONNX_QUANTIZE:
+            backend += "-int8"
+        # The model serving the active collection, which may lag EMBEDDING_MODEL
+        # until a re-embedding migration has switched over
+        from app.services.vector_store_service import read_active_index
+
+        model = read_active_index()["embedding_model"]
+        return f"embeddings-{self._safe(model)}-{backend}-{self._chunking()}.npy"
+
+    def _safe(self, name: str) -> str:
+        return re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
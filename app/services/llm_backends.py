@@ -0,0 +1,173 @@
+from typing import Dict, Any, List, Optional
+from abc import ABC, abstractmethod
+import asyncio
+import hashlib
+import json
+import re
+import time
+import httpx # type: ignore
+
+from app.core.config import settings
+from app.core.exceptions import StudyAssistantException
+
+
+# Every backend answers in Ollama's response shape ({"message": {"content": ...}}
+# plus token counts), which is what the rest of the service reads.
+class LLMBackend(ABC):
+    @abstractmethod
+    async def chat(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        options: Optional[Dict[str, Any]] = None,
+        keep_alive: Optional[str] = None,
+        format: Optional[str] = None
+    ) -> Dict[str, Any]:
+        ...
+
+
+class OllamaBackend(LLMBackend):
+    def __init__(self):
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from ollama import AsyncClient # type: ignore
+
+            self._client = AsyncClient(
+                host=settings.OLLAMA_HOST,
+                timeout=settings.LLM_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_MAX_CONCURRENCY,
+                    max_keepalive_connections=settings.LLM_MAX_CONCURRENCY
+                )
+            )
+        return self._client
+
+    async def chat(self, model, messages, options=None, keep_alive=None, format=None):
+        kwargs = {"options": options, "keep_alive": keep_alive}
+        if format:
+            kwargs["format"] = format
+        return await self.client.chat(model=model, messages=messages, **kwargs)
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    # Any server speaking the OpenAI chat completions API (OpenAI, vLLM, llama.cpp, ...)
+    def __init__(self):
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import AsyncOpenAI # type: ignore
+
+            self._client = AsyncOpenAI(
+                api_key=settings.OPENAI_SECRET_KEY or "unused",
+                base_url=settings.OPENAI_BASE_URL,
+                timeout=settings.LLM_TIMEOUT_SECONDS,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=settings.LLM_MAX_CONCURRENCY,
+                        max_keepalive_connections=settings.LLM_MAX_CONCURRENCY
+                    )
+                )
+            )
+        return self._client
+
+    async def chat(self, model, messages, options=None, keep_alive=None, format=None):
+        options = options or {}
+        kwargs = {}
+        if "num_predict" in options:
+            kwargs["max_tokens"] = options["num_predict"]
+        if "temperature" in options:
+            kwargs["temperature"] = options["temperature"]
+        if format == "json":
+            kwargs["response_format"] = {"type": "json_object"}
+
+        completion = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            **kwargs
+        )
+
+        usage = completion.usage
+        return {
+            "message": {
+                "role": "assistant",
+                "content": completion.choices[0].message.content or ""
+            },
+            "prompt_eval_count": usage.prompt_tokens if usage else 0,
+            "eval_count": usage.completion_tokens if usage else 0
+        }
+
+
+class FakeLLMBackend(LLMBackend):
+    # Deterministic stand-in for load tests and benchmarks: the reply depends only
+    # on the prompt, and latency follows a fixed first-token delay plus a token rate.
+    def __init__(
+        self,
+        latency_seconds: Optional[float] = None,
+        tokens_per_second: Optional[float] = None,
+        reply_tokens: Optional[int] = None
+    ):
+        self.latency_seconds = (
+            settings.FAKE_LLM_LATENCY_SECONDS if latency_seconds is None else latency_seconds
+        )
+        self.tokens_per_second = tokens_per_second or settings.FAKE_LLM_TOKENS_PER_SECOND
+        self.reply_tokens = reply_tokens or settings.FAKE_LLM_REPLY_TOKENS
+
+    async def chat(self, model, messages, options=None, keep_alive=None, format=None):
+        options = options or {}
+        prompt = "\n".join(message["content"] for message in messages)
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+        if format == "json":
+            content = self._quiz_json(messages[-1]["content"], digest)
+        else:
+            tokens = min(self.reply_tokens, options.get("num_predict") or self.reply_tokens)
+            content = " ".join(digest[i % 56:i % 56 + 8] for i in range(tokens))
+
+        eval_count = len(content.split())
+        prompt_eval_count = len(prompt) // 4 + 1
+
+        started = time.perf_counter()
+        await asyncio.sleep(self.latency_seconds + eval_count / self.tokens_per_second)
+        elapsed_ns = int((time.perf_counter() - started) * 1e9)
+
+        return {
+            "model": model,
+            "message": {"role": "assistant", "content": content},
+            "done": True,
+            "prompt_eval_count": prompt_eval_count,
+            "prompt_eval_duration": int(self.latency_seconds * 1e9),
+            "eval_count": eval_count,
+            "eval_duration": elapsed_ns - int(self.latency_seconds * 1e9),
+            "total_duration": elapsed_ns
+        }
+
+    def _quiz_json(self, prompt: str, digest: str) -> str:
+        match = re.search(r"generate (\d+) multiple-choice", prompt)
+        count = int(match.group(1)) if match else 1
+        questions = [
+            {
+                "question": f"Question {digest[:8]}-{i}?",
+                "options": [f"Option {letter}" for letter in "ABCD"],
+                "correct_answer": int(digest[i % 64], 16) % 4,
+                "explanation": f"Explanation {digest[8:16]}"
+            }
+            for i in range(count)
+        ]
+        return json.dumps({"questions": questions})
+
+
+def create_backend(name: Optional[str] = None) -> LLMBackend:
+    name = (name or settings.LLM_BACKEND).lower()
+    backends = {
+        "ollama": OllamaBackend,
+        "openai": OpenAICompatibleBackend,
+        "fake": FakeLLMBackend
+    }
+    if name not in backends:
+        raise StudyAssistantException(f"Unknown LLM backend: {name}")
+    return backends[name]()
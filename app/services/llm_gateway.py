@@ -0,0 +1,184 @@
+from typing import Dict, Any, List, Optional, Hashable, Tuple
+from functools import lru_cache
+import asyncio
+import hashlib
+import heapq
+import itertools
+import json
+import time
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.services.llm_backends import LLMBackend, create_backend
+
+llm_queue_seconds = registry.histogram(
+    "llm_queue_seconds",
+    "Time LLM requests waited for a generation slot"
+)
+llm_generation_seconds = registry.histogram(
+    "llm_generation_seconds",
+    "Time spent generating a response once admitted"
+)
+llm_coalesced_requests = registry.counter(
+    "llm_coalesced_requests_total",
+    "Requests served by an identical in-flight generation"
+)
+
+
+class FairScheduler:
+    # Admits at most `limit` concurrent generations, queueing the rest in
+    # fair order. Each waiter gets a virtual finish time of
+    # max(virtual clock, its user's previous finish) + cost and the
+    # earliest finish is admitted next, so a user with a deep backlog only
+    # delays their own requests and short generations aren't stuck behind
+    # long ones from someone else.
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._heap: List[Tuple[float, int, asyncio.Future]] = []
+        self._finish: Dict[Hashable, float] = {}
+        self._virtual_time = 0.0
+        self._sequence = itertools.count()
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, waiter in self._heap if not waiter.done())
+
+    async def acquire(self, user_key: Hashable, cost: float = 1.0):
+        if self.active < self.limit and not self.queue_depth:
+            self.active += 1
+            return
+
+        finish = max(self._virtual_time, self._finish.get(user_key, 0.0)) + cost
+        self._finish[user_key] = finish
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (finish, next(self._sequence), waiter))
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was granted just as we were cancelled; hand it on
+                self.release()
+            else:
+                # Never served: take its cost back off the user's finish time so
+                # their next request isn't queued behind work that won't run.
+                # The cancelled future is skipped when it reaches the top.
+                if user_key in self._finish:
+                    self._finish[user_key] = max(self._virtual_time, self._finish[user_key] - cost)
+            raise
+
+    def release(self):
+        self.active -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        while self.active < self.limit and self._heap:
+            finish, _, waiter = heapq.heappop(self._heap)
+            if waiter.done():
+                continue
+            self._virtual_time = finish
+            self.active += 1
+            waiter.set_result(None)
+
+        if not self._heap:
+            # Every recorded finish is now behind the virtual clock
+            self._finish.clear()
+
+
+class LLMGateway:
+    # Process-wide entry point to the model server: one backend with a pooled
+    # HTTP client, fair admission control and single-flight coalescing of
+    # identical prompts.
+    def __init__(self, backend: Optional[LLMBackend] = None):
+        self.model = settings.LLM_MODEL
+        self.backend = backend or create_backend()
+        self.scheduler = FairScheduler(settings.LLM_MAX_CONCURRENCY)
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+        registry.gauge(
+            "llm_queue_depth",
+            "LLM requests waiting for a generation slot",
+            lambda: self.scheduler.queue_depth
+        )
+        registry.gauge(
+            "llm_active_generations",
+            "LLM generations currently running",
+            lambda: self.scheduler.active
+        )
+        registry.gauge(
+            "llm_inflight_prompts",
+            "Distinct prompts in flight, after coalescing",
+            lambda: len(self._inflight)
+        )
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        user_id: Optional[int] = None,
+        task: str = "chat",
+        **kwargs
+    ) -> Dict[str, Any]:
+        kwargs["options"] = {**self._task_options(task), **kwargs.get("options", {})}
+        kwargs.setdefault("keep_alive", settings.LLM_KEEP_ALIVE)
+        key = self._request_key(messages, kwargs)
+
+        generation = self._inflight.get(key)
+        if generation is not None:
+            llm_coalesced_requests.inc()
+        else:
+            # The generation runs as its own task so one caller disconnecting
+            # doesn't cancel it for the others waiting on the same prompt
+            generation = asyncio.ensure_future(self._generate(messages, user_id, kwargs))
+            self._inflight[key] = generation
+            generation.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        return await asyncio.shield(generation)
+
+    async def _generate(
+        self,
+        messages: List[Dict[str, str]],
+        user_id: Optional[int],
+        kwargs: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        queued = time.perf_counter()
+        # The token budget approximates how long the generation holds a slot
+        await self.scheduler.acquire(user_id, kwargs["options"].get("num_predict", 1))
+        started = time.perf_counter()
+        llm_queue_seconds.observe(started - queued)
+
+        try:
+            return await self.backend.chat(self.model, messages, **kwargs)
+        finally:
+            llm_generation_seconds.observe(time.perf_counter() - started)
+            self.scheduler.release()
+
+    def _task_options(self, task: str) -> Dict[str, Any]:
+        options = {
+            "chat": {
+                "num_ctx": settings.LLM_CHAT_NUM_CTX,
+                "num_predict": settings.LLM_CHAT_NUM_PREDICT
+            },
+            "summary": {
+                "num_ctx": settings.LLM_SUMMARY_NUM_CTX,
+                "num_predict": settings.LLM_SUMMARY_NUM_PREDICT
+            },
+            "quiz": {
+                "num_ctx": settings.LLM_QUIZ_NUM_CTX,
+                "num_predict": settings.LLM_QUIZ_NUM_PREDICT
+            }
+        }
+        return options[task]
+
+    def _request_key(self, messages: List[Dict[str, str]], kwargs: Dict[str, Any]) -> str:
+        payload = json.dumps(
+            {"model": self.model, "messages": messages, **kwargs},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def get_llm_gateway() -> LLMGateway:
+    return LLMGateway()
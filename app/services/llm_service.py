@@ -1,76 +1,127 @@
 from typing import Dict, Any, List, Optional
-# from openai import OpenAI # type: ignore
-from ollama import AsyncClient # type: ignore
+import logging
+import time
+from app.services.llm_gateway import get_llm_gateway
 from app.core.config import settings
 from app.core.exceptions import StudyAssistantException
+from app.core.metrics import registry
+from app.rag.structured_output import parse_quiz_questions
+
+quiz_wasted_seconds = registry.histogram(
+    "quiz_wasted_llm_seconds",
+    "LLM seconds per quiz spent on output that was discarded"
+)
+quiz_attempts = registry.histogram(
+    "quiz_generation_attempts",
+    "LLM calls needed to produce one quiz",
+    buckets=(1, 2, 3, 4, 5)
+)
+
+logger = logging.getLogger(__name__)
+
+# Kept byte-for-byte identical across calls so the model server can reuse its
+# KV cache for the prefix; anything per-request goes after the history.
+CHAT_SYSTEM_PROMPT = (
+    "You are a helpful study assistant. You help students learn by answering questions "
+    "based on their study materials.\n\n"
+    "When provided with context from documents, use that information to give accurate and "
+    "helpful answers. If the context doesn't contain relevant information, say so clearly.\n"
+    "Always be encouraging and supportive in your responses."
+)
 
 
 class LLMService:
     def __init__(self):
-        self.client = AsyncClient(host='http://localhost:11434')
-        self.model = "mistral"
+        self.gateway = get_llm_gateway()
     
     async def generate_chat_response(
         self,
         query: str,
         context: str = "",
-        conversation_history: Optional[List[Dict[str, str]]] = None
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        conversation_summary: Optional[str] = None,
+        user_id: Optional[int] = None
     ) -> str:
         try:
-            messages = []
+            # Stable prefix: system prompt, summary and history
+            messages = [{"role": "system", "content": CHAT_SYSTEM_PROMPT}]
             
-            # System prompt
-            system_prompt = """
+            # Add compressed earlier turns, then the recent ones verbatim
+            if conversation_summary:
+                messages.append({
+                    "role": "system",
+                    "content": f"Summary of the earlier conversation:\n{conversation_summary}"
+                })
             
-                You are a helpful study assistant. You help students learn by answering questions based on their study materials. 
-                
-                When provided with context from documents, use that information to give accurate and helpful answers. 
-                If the context doesn't contain relevant information, say so clearly.
-                Always be encouraging and supportive in your responses.
-            """
+            if conversation_history:
+                messages.extend(conversation_history)
             
+            # Variable suffix: retrieved context travels with the current query
             if context:
-                system_prompt += f"\n\nContext from study materials:\n{context}"
+                query = f"Context from study materials:\n{context}\n\nQuestion: {query}"
+            messages.append({"role": "user", "content": query})
 
-            prompt = f"{system_prompt}\n\nUser: {query}"
-
-            response = await self.client.chat(model=self.model, messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": query}
-            ])
+            response = await self.gateway.chat(messages, user_id=user_id, task="chat")
             
             return response['message']['content'].strip()
-
-            
-            # messages.append({"role": "system", "content": system_prompt})
-            
-            # # Add conversation history
-            # if conversation_history:
-            #     messages.extend(conversation_history)
-            
-            # # Add current query
-            # messages.append({"role": "user", "content": query})
-            
-            # response = await self.client.chat.completions.create(
-            #     model=self.model,
-            #     messages=messages,
-            #     max_tokens=1000,
-            #     temperature=0.7
-            # )
-            
-            # return response.choices[0].message.content.strip()
             
         except Exception as e:
             raise StudyAssistantException(f"Error generating LLM response: {str(e)}")
     
-    async def generate_summary(self, text: str) -> str:
+    async def warmup(self):
+        # Load the model and prime the cache with the chat system prompt
+        await self.gateway.chat(
+            [
+                {"role": "system", "content": CHAT_SYSTEM_PROMPT},
+                {"role": "user", "content": "Hello"}
+            ],
+            task="chat",
+            options={"num_predict": 1}
+        )
+    
+    async def summarize_conversation(
+        self,
+        previous_summary: Optional[str],
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        user_id: Optional[int] = None
+    ) -> str:
+        try:
+            transcript = "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+            prompt = (
+                f"Current summary:\n{previous_summary or '(none)'}\n\n"
+                f"New conversation turns:\n{transcript}\n\n"
+                f"Update the summary to include the new turns. Keep the topics, facts and open "
+                f"questions the student cares about, in under {max_tokens} tokens."
+            )
+
+            response = await self.gateway.chat(
+                [
+                    {
+                        "role": "system", 
+                        "content": "You maintain a running summary of a tutoring conversation."
+                    },
+                    {
+                        "role": "user", 
+                        "content": prompt
+                    }
+                ],
+                user_id=user_id,
+                task="summary"
+            )
+
+            return response['message']['content'].strip()
+            
+        except Exception as e:
+            raise StudyAssistantException(f"Error summarizing conversation: {str(e)}")
+    
+    async def generate_summary(self, text: str, user_id: Optional[int] = None) -> str:
         try:
 
             prompt = f"Summarize the following text concisely:\n\n{text}"
 
-            response = await self.client.chat(
-                model=self.model, 
-                messages=[
+            response = await self.gateway.chat(
+                [
                     {
                         "role": "system", 
                         "content": "You are a helpful summarizer."
@@ -79,22 +130,12 @@ class LLMService:
                         "role": "user", 
                         "content": prompt
                     }
-            ])
+                ],
+                user_id=user_id,
+                task="summary"
+            )
 
             return response['message']['content'].strip()
-
-
-            # response = await self.client.chat.copletions.create(
-            #     model=self.model,
-            #     messages=[
-            #         {"role": "system", "content": "Summarize the following text concisely, focusing on key concepts and main points."},
-            #         {"role": "user", "content": text}
-            #     ],
-            #     max_tokens=300,
-            #     temperature=0.3
-            # )
-            
-            # return response.choices[0].message.content.strip()
             
         except Exception as e:
             raise StudyAssistantException(f"Error generating summary: {str(e)}")
@@ -102,10 +143,69 @@ class LLMService:
     async def generate_quiz_questions(
         self,
         content: str,
-        num_questions: int = 5
+        num_questions: int = 5,
+        user_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        try:
-            prompt = f"""Based on the following content, generate {num_questions} multiple-choice questions with 4 options each. 
+        questions = []
+        wasted_seconds = 0.0
+        attempts = 0
+        error = None
+        
+        # Keep valid questions from every attempt and only ask again for the rest.
+        # A failed attempt costs its retry but not the questions already accepted.
+        while len(questions) < num_questions and attempts <= settings.QUIZ_MAX_RETRIES:
+            missing = num_questions - len(questions)
+            attempts += 1
+            
+            started = time.perf_counter()
+            try:
+                response = await self.gateway.chat(
+                    [
+                        {
+                            "role": "system", 
+                            "content": "You are a quiz generator. Generate educational multiple-choice questions."
+                        },
+                        {
+                            "role": "user", 
+                            "content": self._quiz_prompt(content, missing, questions)
+                        }
+                    ],
+                    user_id=user_id,
+                    task="quiz",
+                    format="json"
+                )
+                candidates = parse_quiz_questions(response['message']['content'])
+            except Exception as e:
+                logger.warning("Quiz generation attempt %s failed: %s", attempts, e)
+                error = e
+                candidates = []
+            elapsed = time.perf_counter() - started
+            
+            seen = {question["question"].lower() for question in questions}
+            accepted = [
+                question for question in candidates
+                if question["question"].lower() not in seen
+            ][:missing]
+            
+            wasted_seconds += elapsed * (missing - len(accepted)) / missing
+            questions.extend(accepted)
+        
+        quiz_wasted_seconds.observe(wasted_seconds)
+        quiz_attempts.observe(attempts)
+        
+        if not questions:
+            if error is not None:
+                raise StudyAssistantException(f"Error generating quiz questions: {str(error)}")
+            raise StudyAssistantException("Error generating quiz questions: model returned no valid questions")
+        return questions
+    
+    def _quiz_prompt(
+        self,
+        content: str,
+        num_questions: int,
+        existing: List[Dict[str, Any]]
+    ) -> str:
+        prompt = f"""Based on the following content, generate {num_questions} multiple-choice questions with 4 options each. 
             Format as JSON with this structure:
             {{
                 "questions": [
@@ -117,40 +217,10 @@ class LLMService:
                     }}
                 ]
             }}
-            
-            Content: {content}"""
-
-            response = await self.client.chat(
-                model=self.model, 
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are a quiz generator. Generate educational multiple-choice questions."
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ]
-            )
-
-            import json
-            result = json.loads(response['message']['content'].strip())
-            return result.get("questions", [])
-            
-            # response = await self.client.chat.completions.create(
-            #     model=self.model,
-            #     messages=[
-            #         {"role": "system", "content": "You are a quiz generator. Generate educational multiple-choice questions."},
-            #         {"role": "user", "content": prompt}
-            #     ],
-            #     max_tokens=1500,
-            #     temperature=0.5
-            # )
-            
-            # import json
-            # result = json.loads(response.choices[0].message.content.strip())
-            # return result.get("questions", [])
-            
-        except Exception as e:
-            raise StudyAssistantException(f"Error generating quiz questions: {str(e)}")
\ No newline at end of file
+            """
+        
+        if existing:
+            asked = "\n".join(f"- {question['question']}" for question in existing)
+            prompt += f"\nDo not repeat these questions:\n{asked}\n"
+        
+        return prompt + f"\nContent: {content}"
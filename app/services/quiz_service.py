@@ -0,0 +1,139 @@
+from typing import List, Dict, Any, Tuple
+import asyncio
+import numpy as np # type: ignore
+from cachetools import LRUCache # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+from fastapi.concurrency import run_in_threadpool # type: ignore
+
+from app.models.document import Document, DocumentChunk
+from app.services.llm_service import LLMService
+from app.services.vector_store_service import VectorStoreService
+from app.core.config import settings
+from app.core.exceptions import StudyAssistantException
+from app.core.telemetry import record_cache, stage_timer
+
+
+class QuizService:
+    def __init__(
+        self,
+        llm_service: LLMService = None,
+        vector_store: VectorStoreService = None
+    ):
+        self.llm_service = llm_service or LLMService()
+        self.vector_store = vector_store or VectorStoreService()
+        self._cache = LRUCache(maxsize=settings.QUIZ_CACHE_SIZE)
+
+    async def generate_quiz(
+        self,
+        document: Document,
+        num_questions: int,
+        db: Session
+    ) -> List[Dict[str, Any]]:
+        cache_key = (document.id, self._document_version(document), num_questions)
+        cached = self._cache.get(cache_key)
+        record_cache("quiz", cached is not None)
+        if cached is not None:
+            return cached
+
+        with stage_timer("quiz", "select_chunks"):
+            groups = await self._select_chunk_groups(document, num_questions, db)
+        if not groups:
+            raise StudyAssistantException("Document has no content")
+
+        # Spread the requested questions over the groups and generate them concurrently
+        base, extra = divmod(num_questions, len(groups))
+        counts = [base + (1 if i < extra else 0) for i in range(len(groups))]
+
+        with stage_timer("quiz", "generate"):
+            results = await asyncio.gather(
+                *(
+                    self.llm_service.generate_quiz_questions(
+                        "\n\n".join(texts), count, document.owner_id
+                    )
+                    for texts, count in zip(groups, counts)
+                ),
+                return_exceptions=True
+            )
+
+        questions = []
+        errors = []
+        for result in results:
+            if isinstance(result, Exception):
+                errors.append(result)
+            else:
+                questions.extend(result)
+
+        if not questions and errors:
+            raise errors[0]
+
+        questions = questions[:num_questions]
+
+        # Only cache complete sets so a partial failure or short answer is retried next time
+        if not errors and len(questions) == num_questions:
+            self._cache[cache_key] = questions
+
+        return questions
+
+    async def _select_chunk_groups(
+        self,
+        document: Document,
+        num_questions: int,
+        db: Session
+    ) -> List[List[str]]:
+        chunks = await self.vector_store.get_document_chunks(document.id, document.owner_id)
+        num_groups = min(num_questions, settings.QUIZ_MAX_CLUSTERS)
+
+        if chunks["ids"]:
+            # KMeans is CPU-bound; keep it off the event loop
+            return await run_in_threadpool(
+                self._cluster_chunks,
+                chunks["documents"],
+                np.asarray(chunks["embeddings"], dtype=np.float32),
+                num_groups
+            )
+
+        # No stored vectors: fall back to evenly spaced chunks from the database
+        texts = [
+            chunk_text for (chunk_text,) in db.query(DocumentChunk.chunk_text).filter(
+                DocumentChunk.document_id == document.id
+            ).order_by(DocumentChunk.chunk_index)
+        ]
+        if not texts and document.content:
+            texts = [document.content[:settings.CHUNK_SIZE * settings.QUIZ_CHUNKS_PER_CLUSTER]]
+        if not texts:
+            return []
+
+        num_groups = min(num_groups, len(texts))
+        positions = np.linspace(0, len(texts) - 1, num_groups).round().astype(int)
+        return [[texts[i]] for i in sorted(set(positions.tolist()))]
+
+    def _cluster_chunks(
+        self,
+        texts: List[str],
+        embeddings: np.ndarray,
+        num_groups: int
+    ) -> List[List[str]]:
+        if len(texts) <= num_groups:
+            return [[text] for text in texts]
+
+        from sklearn.cluster import KMeans # type: ignore
+
+        kmeans = KMeans(n_clusters=num_groups, n_init=4, random_state=0).fit(embeddings)
+        distances = np.linalg.norm(embeddings - kmeans.cluster_centers_[kmeans.labels_], axis=1)
+
+        groups: List[Tuple[int, List[str]]] = []
+        for cluster in range(num_groups):
+            members = np.flatnonzero(kmeans.labels_ == cluster)
+            if members.size == 0:
+                continue
+
+            # Closest chunks to the centroid, kept in reading order
+            closest = members[np.argsort(distances[members])[:settings.QUIZ_CHUNKS_PER_CLUSTER]]
+            closest.sort()
+            groups.append((int(closest[0]), [texts[i] for i in closest]))
+
+        groups.sort(key=lambda group: group[0])
+        return [group_texts for _, group_texts in groups]
+
+    def _document_version(self, document: Document) -> Tuple[Any, Any]:
+        return document.content_hash, document.updated_at or document.created_at
@@ -2,7 +2,9 @@ from typing import List, Dict, Any, Optional
 from app.services.vector_store_service import VectorStoreService
 from app.services.llm_service import LLMService
 from app.services.document_service import DocumentService
+from app.core.config import settings
 from app.core.exceptions import StudyAssistantException
+from app.core.telemetry import stage_timer
 
 
 class RAGService:
@@ -16,25 +18,37 @@ class RAGService:
         query: str,
         user_id: int,
         context_documents: Optional[List[int]] = None,
-        max_sources: int = 5
+        max_sources: int = 5,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        conversation_summary: Optional[str] = None,
+        mmr_lambda: Optional[float] = None,
+        section: Optional[str] = None
     ) -> Dict[str, Any]:
         try:
             # Retrieve relevant documents
-            relevant_docs = await self.vector_store.similarity_search(
-                query=query,
-                user_id=user_id,
-                document_ids=context_documents,
-                k=max_sources
-            )
+            with stage_timer("chat", "retrieve"):
+                relevant_docs = await self.vector_store.similarity_search(
+                    query=query,
+                    user_id=user_id,
+                    document_ids=context_documents,
+                    k=max_sources,
+                    mmr_lambda=settings.RETRIEVAL_MMR_LAMBDA if mmr_lambda is None else mmr_lambda,
+                    section=section
+                )
             
             # Prepare context for LLM
-            context = self._prepare_context(relevant_docs)
+            with stage_timer("chat", "context"):
+                context = self._prepare_context(relevant_docs)
             
             # Generate response
-            response = await self.llm_service.generate_chat_response(
-                query=query,
-                context=context
-            )
+            with stage_timer("chat", "generate"):
+                response = await self.llm_service.generate_chat_response(
+                    query=query,
+                    context=context,
+                    conversation_history=conversation_history,
+                    conversation_summary=conversation_summary,
+                    user_id=user_id
+                )
             
             # Prepare sources information
             sources = self._prepare_sources(relevant_docs)
@@ -54,7 +68,8 @@ class RAGService:
         
         context_parts = []
         for doc in documents:
-            context_parts.append(f"Source: {doc['title']}\nContent: {doc['content']}\n")
+            source = f"{doc['title']} > {doc['section']}" if doc.get("section") else doc["title"]
+            context_parts.append(f"Source: {source}\nContent: {doc['content']}\n")
         
         return "\n---\n".join(context_parts)
     
@@ -64,6 +79,7 @@ class RAGService:
             sources.append({
                 "document_id": doc.get("document_id"),
                 "title": doc.get("title"),
+                "section": doc.get("section") or None,
                 "relevance_score": doc.get("score", 0.0),
                 "chunk_text": doc.get("content", "")[:200] + "..."
             })
@@ -0,0 +1,123 @@
+from typing import Dict, Hashable, List
+from functools import lru_cache
+import logging
+import time
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+rate_limited_requests = registry.counter(
+    "rate_limited_requests_total",
+    "Requests rejected by the per-user rate limiter"
+)
+
+# KEYS[1] bucket hash; ARGV capacity, refill per second, cost.
+# Redis' own clock keeps workers on different hosts consistent.
+_REDIS_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call("HMGET", KEYS[1], "tokens", "updated")
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    retry_after = (cost - tokens) / rate
+end
+
+redis.call("HSET", KEYS[1], "tokens", tokens, "updated", now)
+redis.call("EXPIRE", KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(retry_after)
+"""
+
+
+class MemoryTokenBucket:
+    # Per-process buckets; with several workers each enforces its own limit
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self._buckets: Dict[Hashable, List[float]] = {}
+        self._last_prune = time.monotonic()
+
+    async def consume(self, key: Hashable, cost: float) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+
+        retry_after = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            retry_after = (cost - tokens) / self.rate
+        self._buckets[key] = [tokens, now]
+
+        self._prune(now)
+        return retry_after
+
+    def _prune(self, now: float):
+        # A bucket idle for capacity / rate seconds is full again, same as a missing one
+        idle = self.capacity / self.rate
+        if now - self._last_prune < idle:
+            return
+        self._last_prune = now
+        for key in [key for key, (_, updated) in self._buckets.items() if now - updated >= idle]:
+            del self._buckets[key]
+
+
+class RedisTokenBucket:
+    # Buckets shared by every worker pointing at the same Redis
+    def __init__(self, capacity: float, rate: float):
+        import redis.asyncio as redis # type: ignore
+
+        self.capacity = capacity
+        self.rate = rate
+        self.client = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT)
+        self._script = self.client.register_script(_REDIS_TOKEN_BUCKET)
+        self._fallback = MemoryTokenBucket(capacity, rate)
+
+    async def consume(self, key: Hashable, cost: float) -> float:
+        try:
+            retry_after = await self._script(
+                keys=[f"rate_limit:{key}"],
+                args=[self.capacity, self.rate, cost]
+            )
+            return float(retry_after)
+        except Exception:
+            # Limiting per process beats failing requests while Redis is away
+            logger.warning("Redis rate limiter unavailable; using in-memory buckets", exc_info=True)
+            return await self._fallback.consume(key, cost)
+
+
+class RateLimiter:
+    # Token bucket per user. Every endpoint has a cost in RATE_LIMIT_COSTS
+    # (LLM calls cost more than reads); a user may spend RATE_LIMIT_CAPACITY
+    # tokens in a burst, refilled at RATE_LIMIT_REFILL_PER_SECOND.
+    def __init__(self):
+        capacity = settings.RATE_LIMIT_CAPACITY
+        rate = settings.RATE_LIMIT_REFILL_PER_SECOND
+        if settings.RATE_LIMIT_BACKEND == "redis":
+            self.buckets = RedisTokenBucket(capacity, rate)
+        else:
+            self.buckets = MemoryTokenBucket(capacity, rate)
+
+    async def check(self, user_id: int, endpoint: str) -> float:
+        # Seconds until the request would be allowed; 0 when it was admitted
+        cost = min(settings.RATE_LIMIT_COSTS.get(endpoint, 1.0), settings.RATE_LIMIT_CAPACITY)
+        retry_after = await self.buckets.consume(user_id, cost)
+        if retry_after > 0:
+            rate_limited_requests.inc(endpoint=endpoint)
+        return retry_after
+
+
+@lru_cache(maxsize=None)
+def get_rate_limiter() -> RateLimiter:
+    return RateLimiter()
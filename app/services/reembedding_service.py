@@ -0,0 +1,181 @@
+from typing import Dict, Any, Optional, Callable
+import logging
+import re
+import time
+from sqlalchemy.orm import Session # type: ignore
+
+from app.core.config import settings
+from app.core.exceptions import VectorStoreError
+from app.models.document import Document, DocumentChunk
+from app.services.vector_store_service import (
+    VectorStoreService, get_embedding_model, read_active_index, section_metadata, write_active_index
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ReembeddingService:
+    # Moves the vector store to another embedding model without downtime:
+    #
+    # 1. A migration entry in the active index names a shadow collection and
+    #    the new model. From then on ingestion writes to both collections.
+    # 2. Existing chunks are re-embedded from DocumentChunk.chunk_text into the
+    #    shadow collection in throttled batches, in chunk id order. Progress is
+    #    checkpointed in the index, so an interrupted job resumes.
+    # 3. Document centroids are rebuilt for the shadow, then the index is
+    #    rewritten to point at it, which every worker picks up on its next call.
+    def __init__(self, vector_store: VectorStoreService = None):
+        self.vector_store = vector_store or VectorStoreService()
+
+    def status(self) -> Dict[str, Any]:
+        return read_active_index()
+
+    def start(self, model_name: str) -> Dict[str, Any]:
+        index = dict(read_active_index())
+        migration = index.get("migration")
+        if migration and migration["embedding_model"] == model_name:
+            return index
+        if migration:
+            raise VectorStoreError(
+                f"A migration to {migration['embedding_model']} is already running; abort it first"
+            )
+        if index["embedding_model"] == model_name:
+            raise VectorStoreError(f"{model_name} already serves the active collection")
+
+        suffix = f"{re.sub(r'[^A-Za-z0-9_-]+', '_', model_name)}_{int(time.time())}"
+        index["migration"] = {
+            "embedding_model": model_name,
+            "collection": f"study_documents_{suffix}",
+            "coarse_collection": f"study_documents_coarse_{suffix}",
+            "started_at": time.time(),
+            "last_chunk_id": 0,
+            "done": 0,
+            "total": 0
+        }
+        write_active_index(index)
+        return index
+
+    def abort(self) -> Optional[Dict[str, Any]]:
+        index = dict(read_active_index())
+        migration = index.get("migration")
+        if not migration:
+            return None
+
+        index["migration"] = None
+        write_active_index(index)
+        self.vector_store.drop_collection(migration["collection"])
+        self.vector_store.drop_collection(migration["coarse_collection"])
+        return migration
+
+    def run(
+        self,
+        db: Session,
+        model_name: str,
+        batch_size: int = None,
+        pause_seconds: float = None,
+        drop_old: bool = False,
+        progress: Callable[[Dict[str, Any]], None] = None
+    ) -> Dict[str, Any]:
+        batch_size = batch_size or settings.REEMBED_BATCH_SIZE
+        pause_seconds = settings.REEMBED_PAUSE_SECONDS if pause_seconds is None else pause_seconds
+
+        index = self.start(model_name)
+        migration = dict(index["migration"])
+        shadow = self.vector_store.get_collection(migration["collection"])
+        model = get_embedding_model(model_name, settings.EMBEDDING_BACKEND)
+
+        rows_query = db.query(
+            DocumentChunk.id,
+            DocumentChunk.chunk_text,
+            DocumentChunk.embedding_id,
+            DocumentChunk.document_id,
+            DocumentChunk.chunk_index,
+            DocumentChunk.section,
+            Document.owner_id,
+            Document.title
+        ).join(Document, Document.id == DocumentChunk.document_id)
+
+        while True:
+            migration["total"] = migration["done"] + rows_query.filter(
+                DocumentChunk.id > migration["last_chunk_id"]
+            ).count()
+            rows = rows_query.filter(
+                DocumentChunk.id > migration["last_chunk_id"]
+            ).order_by(DocumentChunk.id).limit(batch_size).all()
+            if not rows:
+                break
+
+            last_chunk_id = rows[-1].id
+            fetched = len(rows)
+            rows = [row for row in rows if row.chunk_text and row.chunk_text.strip()]
+            if rows:
+                texts = [row.chunk_text.strip() for row in rows]
+                embeddings = model.encode(texts, batch_size=settings.EMBEDDING_BATCH_SIZE).tolist()
+                self.vector_store.store_vectors(
+                    shadow,
+                    [
+                        row.embedding_id
+                        or VectorStoreService.vector_id(row.owner_id, row.document_id, row.chunk_index)
+                        for row in rows
+                    ],
+                    texts,
+                    [
+                        {
+                            "user_id": row.owner_id,
+                            "document_id": row.document_id,
+                            "title": row.title,
+                            "chunk_index": row.chunk_index,
+                            "embedding_model": model_name,
+                            **section_metadata(row.section)
+                        }
+                        for row in rows
+                    ],
+                    embeddings
+                )
+
+            migration["last_chunk_id"] = last_chunk_id
+            migration["done"] += fetched
+            self._checkpoint(migration)
+            if progress:
+                progress(migration)
+
+            # Leave CPU for the API workers sharing the machine
+            if pause_seconds:
+                time.sleep(pause_seconds)
+
+        self.vector_store.rebuild_coarse_index(
+            batch_size,
+            source=shadow,
+            target=self.vector_store.get_collection(migration["coarse_collection"])
+        )
+        return self._switch_over(migration, drop_old)
+
+    def _checkpoint(self, migration: Dict[str, Any]):
+        index = dict(read_active_index())
+        index["migration"] = migration
+        write_active_index(index)
+
+    def _switch_over(self, migration: Dict[str, Any], drop_old: bool) -> Dict[str, Any]:
+        previous = read_active_index()
+        index = {
+            "collection": migration["collection"],
+            "coarse_collection": migration["coarse_collection"],
+            "embedding_model": migration["embedding_model"],
+            "migration": None,
+            "previous": {
+                "collection": previous["collection"],
+                "coarse_collection": previous["coarse_collection"],
+                "embedding_model": previous["embedding_model"]
+            },
+            "switched_at": time.time()
+        }
+        write_active_index(index)
+        logger.info(
+            "Switched vector store from %s to %s (%s chunks re-embedded)",
+            previous["embedding_model"], migration["embedding_model"], migration["done"]
+        )
+
+        if drop_old:
+            self.vector_store.drop_collection(previous["collection"])
+            self.vector_store.drop_collection(previous["coarse_collection"])
+        return index
@@ -0,0 +1,78 @@
+from typing import Optional
+from functools import lru_cache
+import asyncio
+import logging
+from sqlalchemy.orm import Session # type: ignore
+from fastapi.concurrency import run_in_threadpool # type: ignore
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.document import Document
+from app.services.extraction_cache import ExtractionCache
+from app.services.llm_gateway import get_llm_gateway
+from app.services.llm_service import LLMService
+
+logger = logging.getLogger(__name__)
+
+
+class SummaryService:
+    # Ingestion stores an extractive summary; the LLM summary replaces it on the
+    # first /summarize call or, with SUMMARY_BACKGROUND_REFINE, from a
+    # background queue that only submits work while the LLM is otherwise idle.
+    def __init__(self, llm_service: LLMService = None):
+        self.llm_service = llm_service or LLMService()
+        self.cache = ExtractionCache()
+        self._queue: Optional[asyncio.Queue] = None
+
+    async def refine(self, document: Document, db: Session) -> str:
+        # Summaries stored before extractive ones existed have no type and came from the LLM
+        if document.summary and document.summary_type != "extractive":
+            return document.summary
+
+        summary = await run_in_threadpool(self.cache.load_summary, document.content_hash)
+        if summary is None:
+            summary = await self.llm_service.generate_summary(document.content, document.owner_id)
+            await run_in_threadpool(self.cache.save_summary, document.content_hash, summary)
+
+        document.summary = summary
+        document.summary_type = "llm"
+        db.commit()
+        return summary
+
+    def enqueue(self, document_id: int):
+        if settings.SUMMARY_BACKGROUND_REFINE:
+            self._get_queue().put_nowait(document_id)
+
+    async def run_background_refiner(self):
+        queue = self._get_queue()
+        gateway = get_llm_gateway()
+        while True:
+            document_id = await queue.get()
+            try:
+                # Yield to interactive requests: wait for a free slot and no queue
+                while gateway.scheduler.queue_depth or gateway.scheduler.active >= gateway.scheduler.limit:
+                    await asyncio.sleep(settings.SUMMARY_BACKGROUND_IDLE_POLL_SECONDS)
+                await self._refine_by_id(document_id)
+            except Exception:
+                logger.exception("Background summary for document %s failed", document_id)
+            finally:
+                queue.task_done()
+
+    async def _refine_by_id(self, document_id: int):
+        db = SessionLocal()
+        try:
+            document = db.query(Document).filter(Document.id == document_id).first()
+            if document and document.content:
+                await self.refine(document, db)
+        finally:
+            db.close()
+
+    def _get_queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+
+
+@lru_cache(maxsize=None)
+def get_summary_service() -> SummaryService:
+    return SummaryService()
@@ -0,0 +1,244 @@
+from typing import Dict, Any, List, Tuple, Optional
+from contextlib import asynccontextmanager
+import asyncio
+import os
+import json
+import uuid
+import hashlib
+from pathlib import Path
+from fastapi import UploadFile # type: ignore
+from fastapi.concurrency import run_in_threadpool # type: ignore
+from app.core.config import settings
+from app.core.exceptions import DocumentProcessingError, UploadTooLargeError
+
+# upload_id -> [lock, holders and waiters]; shared by every UploadService in the process
+_upload_locks: Dict[str, List[Any]] = {}
+
+
+# Streams uploads to disk in fixed-size chunks off the event loop. Large files
+# can be sent as resumable uploads: open, append chunks at the received offset
+# (resending from there after a failure), then complete.
+class UploadService:
+    def __init__(
+        self,
+        upload_dir: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        max_size: Optional[int] = None
+    ):
+        self.upload_dir = Path(upload_dir or settings.UPLOAD_DIR)
+        self.partial_dir = self.upload_dir / ".partial"
+        self.chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+        self.max_size = max_size or settings.MAX_UPLOAD_SIZE
+
+    def validate_filename(self, filename: str) -> Tuple[str, str]:
+        name = Path(filename or "").name
+        if not name:
+            raise DocumentProcessingError("Missing file name")
+
+        file_extension = Path(name).suffix.lower()
+        if file_extension not in settings.ALLOWED_FILE_TYPES:
+            raise DocumentProcessingError(f"File type {file_extension} not supported")
+
+        return name, file_extension
+
+    def destination_for(self, filename: str, user_id: int) -> Path:
+        # Unique per upload: files with the same name, in one batch or in
+        # concurrent requests, must not overwrite each other or share a temp file
+        self.upload_dir.mkdir(parents=True, exist_ok=True)
+        return self.upload_dir / f"{user_id}_{uuid.uuid4().hex}_{filename}"
+
+    async def save_upload(self, file: UploadFile, destination: Path) -> Tuple[int, str]:
+        # Hash while writing; only move into place once the whole file fits
+        temp_path = destination.with_name(destination.name + ".part")
+        hasher = hashlib.sha256()
+        size = 0
+
+        buffer = await run_in_threadpool(open, temp_path, "wb")
+        try:
+            while True:
+                chunk = await file.read(self.chunk_size)
+                if not chunk:
+                    break
+
+                size += len(chunk)
+                if size > self.max_size:
+                    raise UploadTooLargeError(
+                        f"File exceeds maximum upload size of {self.max_size} bytes"
+                    )
+
+                await run_in_threadpool(self._write_chunk, buffer, hasher, chunk)
+        except BaseException:
+            await run_in_threadpool(buffer.close)
+            await run_in_threadpool(self._remove, temp_path)
+            raise
+
+        await run_in_threadpool(buffer.close)
+        await run_in_threadpool(os.replace, temp_path, destination)
+        return size, hasher.hexdigest()
+
+    async def start_upload(
+        self,
+        filename: str,
+        total_size: int,
+        user_id: int
+    ) -> Dict[str, Any]:
+        name, _ = self.validate_filename(filename)
+        if total_size <= 0:
+            raise DocumentProcessingError("Upload size must be positive")
+        if total_size > self.max_size:
+            raise UploadTooLargeError(
+                f"File exceeds maximum upload size of {self.max_size} bytes"
+            )
+
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+        upload_id = uuid.uuid4().hex
+        meta = {
+            "upload_id": upload_id,
+            "filename": name,
+            "total_size": total_size,
+            "user_id": user_id
+        }
+
+        await run_in_threadpool(self._write_meta, upload_id, meta)
+        await run_in_threadpool(self._data_path(upload_id).touch)
+        return {**meta, "offset": 0}
+
+    async def get_upload(self, upload_id: str, user_id: int) -> Dict[str, Any]:
+        meta = await run_in_threadpool(self._read_meta, upload_id, user_id)
+        offset = await run_in_threadpool(self._current_offset, upload_id)
+        return {**meta, "offset": offset}
+
+    async def append_chunk(
+        self,
+        upload_id: str,
+        user_id: int,
+        offset: int,
+        file: UploadFile
+    ) -> Dict[str, Any]:
+        async with self._locked(upload_id):
+            return await self._append_chunk(upload_id, user_id, offset, file)
+
+    async def _append_chunk(
+        self,
+        upload_id: str,
+        user_id: int,
+        offset: int,
+        file: UploadFile
+    ) -> Dict[str, Any]:
+        # Read the offset under the lock: a retry racing the original request
+        # must see the bytes the other one wrote and be rejected
+        upload = await self.get_upload(upload_id, user_id)
+        if offset != upload["offset"]:
+            raise DocumentProcessingError(
+                f"Chunk offset {offset} does not match received bytes {upload['offset']}"
+            )
+
+        size = upload["offset"]
+        buffer = await run_in_threadpool(open, self._data_path(upload_id), "ab")
+        try:
+            while True:
+                chunk = await file.read(self.chunk_size)
+                if not chunk:
+                    break
+
+                size += len(chunk)
+                if size > upload["total_size"]:
+                    raise UploadTooLargeError(
+                        f"Chunk exceeds declared upload size of {upload['total_size']} bytes"
+                    )
+
+                await run_in_threadpool(buffer.write, chunk)
+        except BaseException:
+            # Drop the partially written chunk so the client can resend it
+            await run_in_threadpool(buffer.truncate, upload["offset"])
+            raise
+        finally:
+            await run_in_threadpool(buffer.close)
+
+        return {**upload, "offset": size}
+
+    async def complete_upload(self, upload_id: str, user_id: int) -> Tuple[Path, str, int, str]:
+        async with self._locked(upload_id):
+            return await self._complete_upload(upload_id, user_id)
+
+    async def _complete_upload(self, upload_id: str, user_id: int) -> Tuple[Path, str, int, str]:
+        upload = await self.get_upload(upload_id, user_id)
+        if upload["offset"] != upload["total_size"]:
+            raise DocumentProcessingError(
+                f"Upload incomplete: received {upload['offset']} of {upload['total_size']} bytes"
+            )
+
+        content_hash = await run_in_threadpool(self._hash_file, self._data_path(upload_id))
+        destination = self.destination_for(upload["filename"], user_id)
+        await run_in_threadpool(os.replace, self._data_path(upload_id), destination)
+        await run_in_threadpool(self._remove, self._meta_path(upload_id))
+
+        return destination, upload["filename"], upload["total_size"], content_hash
+
+    async def abort_upload(self, upload_id: str, user_id: int) -> None:
+        async with self._locked(upload_id):
+            await run_in_threadpool(self._read_meta, upload_id, user_id)
+            await run_in_threadpool(self._remove, self._data_path(upload_id))
+            await run_in_threadpool(self._remove, self._meta_path(upload_id))
+
+    @asynccontextmanager
+    async def _locked(self, upload_id: str):
+        # Serializes appends, completion and abort of one upload within this
+        # process; the entry goes away with its last user
+        entry = _upload_locks.setdefault(upload_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del _upload_locks[upload_id]
+
+    def _write_chunk(self, buffer, hasher, chunk: bytes) -> None:
+        hasher.update(chunk)
+        buffer.write(chunk)
+
+    def _hash_file(self, path: Path) -> str:
+        hasher = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(self.chunk_size), b""):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def _data_path(self, upload_id: str) -> Path:
+        return self.partial_dir / f"{upload_id}.part"
+
+    def _meta_path(self, upload_id: str) -> Path:
+        return self.partial_dir / f"{upload_id}.json"
+
+    def _write_meta(self, upload_id: str, meta: Dict[str, Any]) -> None:
+        with open(self._meta_path(upload_id), "w") as file:
+            json.dump(meta, file)
+
+    def _read_meta(self, upload_id: str, user_id: int) -> Dict[str, Any]:
+        # upload ids are generated hex strings; reject anything else outright
+        if not upload_id.isalnum():
+            raise DocumentProcessingError("Upload not found")
+
+        try:
+            with open(self._meta_path(upload_id)) as file:
+                meta = json.load(file)
+        except FileNotFoundError:
+            raise DocumentProcessingError("Upload not found")
+
+        if meta["user_id"] != user_id:
+            raise DocumentProcessingError("Upload not found")
+        return meta
+
+    def _current_offset(self, upload_id: str) -> int:
+        try:
+            return self._data_path(upload_id).stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def _remove(self, path: Path) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,135 @@
+from typing import Dict, Any, Set
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+from fastapi.concurrency import run_in_threadpool # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.document import Document, DocumentChunk
+from app.services.vector_store_service import VectorStoreService
+
+logger = logging.getLogger(__name__)
+
+
+class VectorGCService:
+    def __init__(self, vector_store: VectorStoreService = None):
+        self.vector_store = vector_store or VectorStoreService()
+        self.persist_directory = Path(settings.CHROMA_PERSIST_DIRECTORY)
+
+    def collect(self, db: Session, compact: bool = None) -> Dict[str, Any]:
+        # Reconcile Chroma ids against document_chunks and drop the orphans
+        started = time.perf_counter()
+        bytes_before = self._directory_size()
+
+        valid_ids = self._valid_ids(db)
+
+        # Vectors are written before their chunk rows commit; leave in-flight documents alone
+        in_flight = {
+            f"_doc_{document_id}_"
+            for (document_id,) in db.query(Document.id).filter(
+                Document.processing_status.in_(["pending", "processing"])
+            )
+        }
+
+        scanned = 0
+        orphaned = []
+        for batch in self.vector_store.iter_ids(settings.VECTOR_GC_BATCH_SIZE):
+            scanned += len(batch)
+            orphaned.extend(
+                vector_id for vector_id in batch
+                if vector_id not in valid_ids and not self._is_in_flight(vector_id, in_flight)
+            )
+
+        # Delete only after the scan so offsets stay stable while paging
+        reclaimed = self.vector_store.delete_ids(orphaned) if orphaned else 0
+
+        # Centroids in the coarse index are orphaned once their document row is gone
+        valid_centroids = {
+            VectorStoreService.document_vector_id(owner_id, document_id)
+            for document_id, owner_id in db.query(Document.id, Document.owner_id)
+        }
+        coarse = self.vector_store.coarse_collection
+        orphaned_centroids = [
+            vector_id
+            for batch in self.vector_store.iter_ids(settings.VECTOR_GC_BATCH_SIZE, coarse)
+            for vector_id in batch
+            if vector_id not in valid_centroids
+        ]
+        if orphaned_centroids:
+            self.vector_store.delete_ids(orphaned_centroids, coarse)
+
+        if compact is None:
+            compact = settings.VECTOR_GC_COMPACT
+        if compact:
+            self._compact()
+
+        return {
+            "scanned_vectors": scanned,
+            "reclaimed_vectors": reclaimed,
+            "reclaimed_document_vectors": len(orphaned_centroids),
+            "reclaimed_bytes": max(bytes_before - self._directory_size(), 0),
+            "duration_seconds": round(time.perf_counter() - started, 3)
+        }
+
+    async def run_periodically(self, interval_seconds: int):
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                report = await run_in_threadpool(self._collect_with_session)
+                logger.info("Vector garbage collection finished: %s", report)
+            except Exception:
+                logger.exception("Vector garbage collection failed")
+
+    def _collect_with_session(self) -> Dict[str, Any]:
+        db = SessionLocal()
+        try:
+            return self.collect(db)
+        finally:
+            db.close()
+
+    def _valid_ids(self, db: Session) -> Set[str]:
+        rows = db.query(
+            DocumentChunk.embedding_id,
+            DocumentChunk.document_id,
+            DocumentChunk.chunk_index,
+            Document.owner_id
+        ).join(Document, Document.id == DocumentChunk.document_id)
+
+        # Chunks stored before embedding_id was recorded fall back to the derived id
+        return {
+            embedding_id or VectorStoreService.vector_id(owner_id, document_id, chunk_index)
+            for embedding_id, document_id, chunk_index, owner_id in rows
+        }
+
+    def _is_in_flight(self, vector_id: str, in_flight: Set[str]) -> bool:
+        if not in_flight:
+            return False
+        marker = vector_id[vector_id.find("_doc_"):vector_id.rfind("_chunk_") + 1]
+        return marker in in_flight
+
+    def _compact(self):
+        # Chroma keeps its metadata and WAL in sqlite; VACUUM returns freed pages to disk
+        database_path = self.persist_directory / "chroma.sqlite3"
+        if not database_path.exists():
+            return
+
+        connection = sqlite3.connect(database_path)
+        try:
+            connection.execute("VACUUM")
+        finally:
+            connection.close()
+
+    def _directory_size(self) -> int:
+        total = 0
+        for root, _, files in os.walk(self.persist_directory):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return total
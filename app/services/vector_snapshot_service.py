@@ -0,0 +1,298 @@
+from typing import List, Dict, Any, Optional
+from pathlib import Path
+import hashlib
+import json
+import os
+import re
+import time
+
+from app.core.config import settings
+from app.core.exceptions import VectorStoreError
+from app.services.vector_store_service import (
+    VectorStoreService, read_active_index, write_active_index
+)
+
+
+def _pack_strings(values: List[str]):
+    # Variable-length strings as one UTF-8 buffer plus end offsets, which numpy
+    # stores without pickling and loads without per-row padding
+    import numpy as np # type: ignore
+
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.cumsum([len(value) for value in encoded], dtype=np.int64)
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_strings(buffer, offsets) -> List[str]:
+    data = buffer.tobytes()
+    values = []
+    start = 0
+    for end in offsets.tolist():
+        values.append(data[start:end].decode("utf-8"))
+        start = end
+    return values
+
+
+class VectorSnapshotService:
+    # Snapshots of the active chunk collection under VECTOR_SNAPSHOT_DIR:
+    #
+    #   manifest.json                 ordered list of snapshots
+    #   <name>/vectors.npz            float32 embeddings plus ids, texts, metadata
+    #   <name>/state.npz              id -> content digest as of that snapshot
+    #
+    # A full snapshot holds every vector; an incremental one only the vectors
+    # added or changed since the previous snapshot plus the ids deleted since.
+    # A snapshot exists once it is in the manifest, which is written last, so
+    # an interrupted run leaves an ignored directory rather than a state that
+    # later incrementals would diff against.
+    # Restore replays the last full snapshot and the incrementals after it into
+    # a new collection and then points the active index at it, so API workers
+    # switch over instead of losing the collection they have open.
+    # Document centroids are derived data and are rebuilt after a restore.
+    def __init__(self, vector_store: VectorStoreService = None, directory: Optional[str] = None):
+        self.vector_store = vector_store or VectorStoreService()
+        self.directory = Path(directory or settings.VECTOR_SNAPSHOT_DIR)
+
+    def list_snapshots(self) -> List[Dict[str, Any]]:
+        return self._read_manifest()["snapshots"]
+
+    def create_snapshot(self, full: bool = False, batch_size: int = 1000) -> Dict[str, Any]:
+        import numpy as np # type: ignore
+
+        started = time.perf_counter()
+        manifest = self._read_manifest()
+        index = read_active_index()
+        collection = self.vector_store.collection
+
+        # After a re-embedding switchover every vector differs; start a new chain
+        last = manifest["snapshots"][-1] if manifest["snapshots"] else None
+        if last is None or last["collection"] != index["collection"]:
+            full = True
+        previous = {} if full else self._read_state(last)
+        incremental = not full
+
+        # Page through a fixed id list: offset paging while the API deletes
+        # vectors shifts pages and skips ids, which would then look deleted.
+        # Ids removed after the listing are simply missing from their batch.
+        all_ids = collection.get(include=[])["ids"]
+
+        ids, embeddings, documents, metadatas = [], [], [], []
+        current = {}
+        for offset in range(0, len(all_ids), batch_size):
+            batch = collection.get(
+                ids=all_ids[offset:offset + batch_size],
+                include=["embeddings", "documents", "metadatas"]
+            )
+            for vector_id, embedding, document, metadata in zip(
+                batch["ids"], batch["embeddings"], batch["documents"], batch["metadatas"]
+            ):
+                vector = np.asarray(embedding, dtype=np.float32)
+                digest = self._digest(vector, document, metadata)
+                current[vector_id] = digest
+                if previous.get(vector_id) != digest:
+                    ids.append(vector_id)
+                    embeddings.append(vector)
+                    documents.append(document or "")
+                    metadatas.append(json.dumps(metadata, sort_keys=True))
+
+        deleted = [vector_id for vector_id in previous if vector_id not in current]
+
+        # Snapshots taken within the same second get a counter; never write
+        # into an existing directory
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        kind = "-incremental" if incremental else "-full"
+        name = stamp + kind
+        attempt = 1
+        while (self.directory / name).exists():
+            attempt += 1
+            name = f"{stamp}-{attempt}{kind}"
+        snapshot_dir = self.directory / name
+        snapshot_dir.mkdir(parents=True)
+
+        dimension = len(embeddings[0]) if embeddings else 0
+        ids_buffer, ids_offsets = _pack_strings(ids)
+        documents_buffer, documents_offsets = _pack_strings(documents)
+        metadatas_buffer, metadatas_offsets = _pack_strings(metadatas)
+        deleted_buffer, deleted_offsets = _pack_strings(deleted)
+        self._save_npz(
+            snapshot_dir / "vectors.npz",
+            embeddings=np.stack(embeddings) if embeddings else np.zeros((0, dimension), dtype=np.float32),
+            ids=ids_buffer,
+            ids_offsets=ids_offsets,
+            documents=documents_buffer,
+            documents_offsets=documents_offsets,
+            metadatas=metadatas_buffer,
+            metadatas_offsets=metadatas_offsets,
+            deleted=deleted_buffer,
+            deleted_offsets=deleted_offsets
+        )
+        self._write_state(snapshot_dir, current)
+
+        entry = {
+            "name": name,
+            "kind": "incremental" if incremental else "full",
+            "created_at": time.time(),
+            "collection": index["collection"],
+            "coarse_collection": index["coarse_collection"],
+            "embedding_model": index["embedding_model"],
+            "vectors": len(ids),
+            "deleted": len(deleted),
+            "total": len(current),
+            "bytes": (snapshot_dir / "vectors.npz").stat().st_size,
+            "duration_seconds": round(time.perf_counter() - started, 3)
+        }
+        manifest["snapshots"].append(entry)
+        self._write_manifest(manifest)
+        return entry
+
+    def restore(
+        self,
+        upto: Optional[str] = None,
+        collection_name: Optional[str] = None,
+        batch_size: int = None
+    ) -> Dict[str, Any]:
+        import numpy as np # type: ignore
+
+        # Builds the restored vectors in a collection of their own while the
+        # active one keeps serving, then switches the active index over. The
+        # previous collections are kept and recorded under "previous".
+        started = time.perf_counter()
+        chain = self._restore_chain(upto)
+        index = read_active_index()
+        # Switching the index would silently drop the migration's progress
+        if index.get("migration"):
+            raise VectorStoreError(
+                "A re-embedding migration is in progress; let it finish or run reembed-abort before restoring"
+            )
+        if not collection_name:
+            base_name = re.sub(r"_restore_\d+$", "", chain[-1]["collection"])
+            collection_name = f"{base_name}_restore_{int(time.time())}"
+        target_name = collection_name
+        coarse_name = f"{collection_name}_coarse"
+        serving = {index["collection"], index["coarse_collection"]}
+        if target_name in serving or coarse_name in serving:
+            raise VectorStoreError(f"{collection_name} is serving searches; restore into another collection")
+        embedding_model = chain[-1]["embedding_model"]
+
+        # Start from an empty collection so vectors absent from the snapshot don't linger
+        self.vector_store.drop_collection(target_name)
+        target = self.vector_store.get_collection(target_name)
+        batch_size = batch_size or self.vector_store.client.get_max_batch_size()
+
+        restored = 0
+        for entry in chain:
+            with np.load(self.directory / entry["name"] / "vectors.npz") as data:
+                ids = _unpack_strings(data["ids"], data["ids_offsets"])
+                documents = _unpack_strings(data["documents"], data["documents_offsets"])
+                metadatas = [
+                    json.loads(metadata)
+                    for metadata in _unpack_strings(data["metadatas"], data["metadatas_offsets"])
+                ]
+                deleted = _unpack_strings(data["deleted"], data["deleted_offsets"])
+                embeddings = data["embeddings"]
+
+            for start in range(0, len(deleted), batch_size):
+                target.delete(ids=deleted[start:start + batch_size])
+            for start in range(0, len(ids), batch_size):
+                end = start + batch_size
+                target.upsert(
+                    ids=ids[start:end],
+                    embeddings=embeddings[start:end].tolist(),
+                    documents=documents[start:end],
+                    metadatas=metadatas[start:end]
+                )
+            restored += len(ids)
+
+        self.vector_store.drop_collection(coarse_name)
+        documents_indexed = self.vector_store.rebuild_coarse_index(
+            source=target,
+            target=self.vector_store.get_collection(coarse_name)
+        )
+
+        index = read_active_index()
+        write_active_index({
+            "collection": target_name,
+            "coarse_collection": coarse_name,
+            "embedding_model": embedding_model,
+            "migration": None,
+            "previous": {
+                "collection": index["collection"],
+                "coarse_collection": index["coarse_collection"],
+                "embedding_model": index["embedding_model"]
+            },
+            "switched_at": time.time()
+        })
+
+        return {
+            "snapshots": [entry["name"] for entry in chain],
+            "collection": target_name,
+            "restored_vectors": restored,
+            "total_vectors": target.count(),
+            "documents_indexed": documents_indexed,
+            "duration_seconds": round(time.perf_counter() - started, 3)
+        }
+
+    def _restore_chain(self, upto: Optional[str]) -> List[Dict[str, Any]]:
+        snapshots = self.list_snapshots()
+        if upto is not None:
+            names = [entry["name"] for entry in snapshots]
+            if upto not in names:
+                raise VectorStoreError(f"Unknown snapshot: {upto}")
+            snapshots = snapshots[:names.index(upto) + 1]
+
+        fulls = [i for i, entry in enumerate(snapshots) if entry["kind"] == "full"]
+        if not fulls:
+            raise VectorStoreError("No full snapshot to restore from")
+        return snapshots[fulls[-1]:]
+
+    def _digest(self, vector, document: Optional[str], metadata: Dict[str, Any]) -> bytes:
+        digest = hashlib.blake2b(vector.tobytes(), digest_size=16)
+        digest.update((document or "").encode("utf-8"))
+        digest.update(json.dumps(metadata, sort_keys=True).encode("utf-8"))
+        return digest.digest()
+
+    def _read_state(self, entry: Dict[str, Any]) -> Dict[str, bytes]:
+        import numpy as np # type: ignore
+
+        path = self.directory / entry["name"] / "state.npz"
+        if not path.exists():
+            return {}
+        with np.load(path) as data:
+            ids = _unpack_strings(data["ids"], data["ids_offsets"])
+            return dict(zip(ids, (digest.tobytes() for digest in data["digests"])))
+
+    def _write_state(self, snapshot_dir: Path, state: Dict[str, bytes]):
+        import numpy as np # type: ignore
+
+        ids_buffer, ids_offsets = _pack_strings(list(state))
+        self._save_npz(
+            snapshot_dir / "state.npz",
+            ids=ids_buffer,
+            ids_offsets=ids_offsets,
+            digests=np.frombuffer(b"".join(state.values()), dtype=np.uint8).reshape(-1, 16)
+        )
+
+    def _save_npz(self, path: Path, **arrays):
+        # Uncompressed: float32 embeddings barely compress, and restore is disk-bound
+        import numpy as np # type: ignore
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(temp_path, "wb") as file:
+            np.savez(file, **arrays)
+        os.replace(temp_path, path)
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        path = self.directory / "manifest.json"
+        if not path.exists():
+            return {"snapshots": []}
+        with open(path) as file:
+            return json.load(file)
+
+    def _write_manifest(self, manifest: Dict[str, Any]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / "manifest.json"
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(temp_path, "w") as file:
+            json.dump(manifest, file, indent=2)
+        os.replace(temp_path, path)
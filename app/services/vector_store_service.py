@@ -1,112 +1,593 @@
-import chromadb # type: ignore
-from chromadb.config import Settings # type: ignore
-from typing import List, Dict, Any, Optional
-from sentence_transformers import SentenceTransformer # type: ignore
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from functools import lru_cache
+from pathlib import Path
+import json
+import os
 from app.core.config import settings
 from app.core.exceptions import VectorStoreError
+from app.core.metrics import registry
+from app.core.telemetry import stage_timer
+
+
+# chromadb and the embedding model (torch or onnxruntime) take seconds to import and load, so
+# they are only pulled in on first use and shared by every VectorStoreService.
+@lru_cache(maxsize=None)
+def get_chroma_client(path: str):
+    import chromadb # type: ignore
+    from chromadb.config import Settings # type: ignore
+
+    return chromadb.PersistentClient(
+        path=path,
+        settings=Settings(anonymized_telemetry=False)
+    )
+
+
+@lru_cache(maxsize=None)
+def get_embedding_model(model_name: str, backend: str = "torch"):
+    from app.rag.embeddings import load_embedding_model
+
+    return load_embedding_model(
+        model_name,
+        backend,
+        quantize=settings.EMBEDDING_ONNX_QUANTIZE,
+        threads=settings.EMBEDDING_THREADS
+    )
+
+
+@lru_cache(maxsize=None)
+def get_embedding_batcher(model_name: str):
+    from app.rag.embeddings import EmbeddingBatcher
+
+    return EmbeddingBatcher(
+        lambda: get_embedding_model(model_name, settings.EMBEDDING_BACKEND),
+        window=settings.EMBEDDING_BATCH_WINDOW_MS / 1000,
+        max_batch=settings.EMBEDDING_BATCH_SIZE
+    )
+
+
+# The active index names the collections serving traffic and the embedding
+# model that produced them. Without the file, the original collections and
+# settings.EMBEDDING_MODEL are used. The re-embedding job records a running
+# migration in it and swaps the pointer atomically when the shadow collection
+# is complete; workers re-read it whenever it changes, so no restart is needed.
+_active_index_cache: Dict[str, Any] = {"path": None, "mtime": None, "index": None}
+
+
+def active_index_path() -> Path:
+    return Path(settings.CHROMA_PERSIST_DIRECTORY) / "active_index.json"
+
+
+def default_active_index() -> Dict[str, Any]:
+    return {
+        "collection": "study_documents",
+        "coarse_collection": "study_documents_coarse",
+        "embedding_model": settings.EMBEDDING_MODEL,
+        "migration": None
+    }
+
+
+def read_active_index() -> Dict[str, Any]:
+    path = active_index_path()
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return default_active_index()
+
+    mtime = (stat.st_mtime_ns, stat.st_size)
+    if _active_index_cache["path"] != path or _active_index_cache["mtime"] != mtime:
+        with open(path) as file:
+            index = json.load(file)
+        _active_index_cache.update(path=path, mtime=mtime, index=index)
+    return _active_index_cache["index"]
+
+
+def write_active_index(index: Dict[str, Any]):
+    path = active_index_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(temp_path, "w") as file:
+        json.dump(index, file, indent=2)
+    os.replace(temp_path, path)
+
+
+# Joins heading levels in a section path, as app.rag.document_processor writes them
+SECTION_SEPARATOR = " > "
+
+
+def section_metadata(section: Optional[str]) -> Dict[str, str]:
+    # Chroma filters only match whole values, so besides the full heading path
+    # each chunk stores every ancestor prefix as section_<depth>:
+    # "A > B > C" -> section_1 "A", section_2 "A > B", section_3 "A > B > C".
+    # A filter on "A > B" then matches section_2 and catches everything under it.
+    if not section:
+        return {}
+    parts = section.split(SECTION_SEPARATOR)
+    metadata = {"section": section}
+    for depth in range(1, len(parts) + 1):
+        metadata[f"section_{depth}"] = SECTION_SEPARATOR.join(parts[:depth])
+    return metadata
+
+
+def _migration_progress() -> float:
+    migration = read_active_index().get("migration")
+    if not migration or not migration.get("total"):
+        return 0.0
+    return migration["done"] / migration["total"]
+
+
+reembedding_progress = registry.gauge(
+    "reembedding_progress_ratio",
+    "Share of chunks copied into the shadow collection by a running re-embedding migration",
+    function=_migration_progress
+)
 
 
 class VectorStoreService:
     def __init__(self):
-        self.client = chromadb.PersistentClient(
-            path=settings.CHROMA_PERSIST_DIRECTORY,
-            settings=Settings(anonymized_telemetry=False)
-        )
-        self.embedding_model = SentenceTransformer(settings.EMBEDDING_MODEL)
-        self.collection_name = "study_documents"
-        self.collection = self._get_or_create_collection()
+        self._collections: Dict[str, Any] = {}
+    
+    @property
+    def client(self):
+        return get_chroma_client(settings.CHROMA_PERSIST_DIRECTORY)
+    
+    @property
+    def collection_name(self) -> str:
+        return read_active_index()["collection"]
+    
+    @property
+    def coarse_collection_name(self) -> str:
+        return read_active_index()["coarse_collection"]
+    
+    @property
+    def embedding_model_name(self) -> str:
+        return read_active_index()["embedding_model"]
+    
+    @property
+    def embedding_model(self):
+        return get_embedding_model(self.embedding_model_name, settings.EMBEDDING_BACKEND)
     
-    def _get_or_create_collection(self):
+    @property
+    def embedding_batcher(self):
+        return get_embedding_batcher(self.embedding_model_name)
+    
+    @property
+    def collection(self):
+        return self.get_collection(self.collection_name)
+    
+    @property
+    def coarse_collection(self):
+        # One centroid vector per document, for two-stage retrieval
+        return self.get_collection(self.coarse_collection_name)
+    
+    def get_collection(self, name: str):
+        if name not in self._collections:
+            self._collections[name] = self._get_or_create_collection(name)
+        return self._collections[name]
+    
+    def drop_collection(self, name: str):
+        self._collections.pop(name, None)
         try:
-            return self.client.get_collection(name=self.collection_name)
+            self.client.delete_collection(name=name)
+        except Exception:
+            pass
+    
+    def warmup(self):
+        # Load the model and open the collection ahead of the first request
+        self.embedding_model.encode(["warmup"])
+        return self.collection
+    
+    def _get_or_create_collection(self, name: str):
+        try:
+            return self.client.get_collection(name=name)
         except:
             return self.client.create_collection(
-                name=self.collection_name,
+                name=name,
                 metadata={"hnsw:space": "cosine"}
             )
     
+    async def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with stage_timer("ingest", "embed"):
+            return await self.embedding_batcher.encode(texts, bulk=True)
+    
     async def add_documents(
         self,
         documents: List[Dict[str, Any]],
-        user_id: int
+        user_id: int,
+        embeddings: Optional[List[List[float]]] = None
     ) -> bool:
+        # `embeddings`, when given, are precomputed and aligned with `documents`
         try:
             texts = []
             metadatas = []
             ids = []
+            kept_embeddings = []
             
-            for doc in documents:
+            for i, doc in enumerate(documents):
                 content = doc["content"].strip()
                 if not content:
                     continue
 
                 texts.append(content)
-                metadatas.append({
+                metadata = {
                     "user_id": user_id,
                     "document_id": doc["document_id"],
                     "title": doc["title"],
-                    "chunk_index": doc.get("chunk_index", 0)
-                })
-                ids.append(f"user_{user_id}_doc_{doc['document_id']}_chunk_{doc.get('chunk_index', 0)}")
+                    "chunk_index": doc.get("chunk_index", 0),
+                    "embedding_model": self.embedding_model_name
+                }
+                metadata.update(section_metadata(doc.get("section")))
+                metadatas.append(metadata)
+                ids.append(self.vector_id(user_id, doc["document_id"], doc.get("chunk_index", 0)))
+                if embeddings is not None:
+                    kept_embeddings.append(embeddings[i])
 
-                if not texts:
-                    raise VectorStoreError("No valid document chunks to embed. Texts list is empty.")
+            if not texts:
+                raise VectorStoreError("No valid document chunks to embed. Texts list is empty.")
 
+            if embeddings is None:
+                embeddings = await self.embed_documents(texts)
+            else:
+                embeddings = kept_embeddings
             
-            embeddings = self.embedding_model.encode(texts).tolist()
+            with stage_timer("ingest", "store"):
+                self.store_vectors(self.collection, ids, texts, metadatas, embeddings)
+                self._upsert_centroids(self.coarse_collection, metadatas, embeddings)
             
-            self.collection.add(
-                embeddings=embeddings,
-                documents=texts,
-                metadatas=metadatas,
-                ids=ids
-            )
+            # While a re-embedding migration runs, new chunks go to its shadow
+            # collection as well, embedded with the incoming model
+            migration = read_active_index().get("migration")
+            if migration:
+                with stage_timer("ingest", "shadow"):
+                    shadow_embeddings = await get_embedding_batcher(migration["embedding_model"]).encode(
+                        texts, bulk=True
+                    )
+                    shadow_metadatas = [
+                        {**metadata, "embedding_model": migration["embedding_model"]}
+                        for metadata in metadatas
+                    ]
+                    self.store_vectors(
+                        self.get_collection(migration["collection"]),
+                        ids, texts, shadow_metadatas, shadow_embeddings
+                    )
+                    self._upsert_centroids(
+                        self.get_collection(migration["coarse_collection"]),
+                        shadow_metadatas, shadow_embeddings
+                    )
             
             return True
         except Exception as e:
             raise VectorStoreError(f"Error adding documents to vector store: {str(e)}")
     
+    def store_vectors(
+        self,
+        collection,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        embeddings: List[List[float]]
+    ):
+        # Chroma caps how many records a single call may carry. Upsert keeps
+        # retries and the re-embedding job's overlap with live writes idempotent.
+        max_batch = self.client.get_max_batch_size()
+        for start in range(0, len(ids), max_batch):
+            end = start + max_batch
+            collection.upsert(
+                embeddings=embeddings[start:end],
+                documents=texts[start:end],
+                metadatas=metadatas[start:end],
+                ids=ids[start:end]
+            )
+    
+    def _upsert_centroids(
+        self,
+        coarse_collection,
+        metadatas: List[Dict[str, Any]],
+        embeddings: List[List[float]]
+    ):
+        # Expects every chunk of each document in one call, as ingestion does
+        import numpy as np # type: ignore
+        
+        grouped: Dict[int, List[int]] = {}
+        for i, metadata in enumerate(metadatas):
+            grouped.setdefault(metadata["document_id"], []).append(i)
+        
+        ids = []
+        centroids = []
+        centroid_metadatas = []
+        for document_id, indexes in grouped.items():
+            metadata = metadatas[indexes[0]]
+            ids.append(self.document_vector_id(metadata["user_id"], document_id))
+            centroids.append(self._centroid(np.asarray([embeddings[i] for i in indexes], dtype=np.float32)))
+            centroid_metadatas.append({
+                "user_id": metadata["user_id"],
+                "document_id": document_id,
+                "title": metadata["title"],
+                "chunks": len(indexes)
+            })
+        
+        coarse_collection.upsert(ids=ids, embeddings=centroids, metadatas=centroid_metadatas)
+    
+    def _centroid(self, embeddings) -> List[float]:
+        import numpy as np # type: ignore
+        
+        centroid = embeddings.mean(axis=0)
+        return (centroid / max(float(np.linalg.norm(centroid)), 1e-12)).tolist()
+    
+    def rebuild_coarse_index(self, batch_size: int = 1000, source=None, target=None) -> int:
+        # Recompute every document centroid from the stored chunk vectors, e.g.
+        # for documents ingested before the coarse index existed
+        import numpy as np # type: ignore
+        
+        source = source or self.collection
+        target = target or self.coarse_collection
+        sums: Dict[Tuple[int, int], Any] = {}
+        counts: Dict[Tuple[int, int], int] = {}
+        titles: Dict[Tuple[int, int], str] = {}
+        offset = 0
+        while True:
+            batch = source.get(
+                include=["embeddings", "metadatas"],
+                limit=batch_size,
+                offset=offset
+            )
+            if not batch["ids"]:
+                break
+            for embedding, metadata in zip(batch["embeddings"], batch["metadatas"]):
+                key = (metadata["user_id"], metadata["document_id"])
+                vector = np.asarray(embedding, dtype=np.float32)
+                sums[key] = sums[key] + vector if key in sums else vector
+                counts[key] = counts.get(key, 0) + 1
+                titles[key] = metadata["title"]
+            offset += len(batch["ids"])
+        
+        keys = list(sums)
+        for start in range(0, len(keys), batch_size):
+            chunk = keys[start:start + batch_size]
+            target.upsert(
+                ids=[self.document_vector_id(user_id, document_id) for user_id, document_id in chunk],
+                embeddings=[self._centroid(sums[key][None, :]) for key in chunk],
+                metadatas=[
+                    {
+                        "user_id": key[0],
+                        "document_id": key[1],
+                        "title": titles[key],
+                        "chunks": counts[key]
+                    }
+                    for key in chunk
+                ]
+            )
+        return len(keys)
+    
     async def similarity_search(
         self,
         query: str,
         user_id: int,
         document_ids: Optional[List[int]] = None,
-        k: int = 5
+        k: int = 5,
+        mmr_lambda: Optional[float] = None,
+        section: Optional[str] = None
     ) -> List[Dict[str, Any]]:
+        results = await self.similarity_search_many([query], user_id, document_ids, k, mmr_lambda, section)
+        return results[0]
+    
+    async def similarity_search_many(
+        self,
+        queries: List[str],
+        user_id: int,
+        document_ids: Optional[List[int]] = None,
+        k: int = 5,
+        mmr_lambda: Optional[float] = None,
+        section: Optional[str] = None
+    ) -> List[List[Dict[str, Any]]]:
+        # One encode batch and one collection.query for every query; results
+        # come back per query, in the order given, under the same filter.
+        # With mmr_lambda set, k * RETRIEVAL_MMR_FETCH_FACTOR candidates are
+        # fetched and re-ranked for diversity (see app.rag.diversity). With
+        # RETRIEVAL_COARSE_DOCUMENTS set and no explicit document filter, each
+        # query first picks its closest documents by centroid and only their
+        # chunks are searched. `section` limits results to chunks under that
+        # heading path (as it appears in results) or any of its subsections.
+        if not queries:
+            return []
         try:
-            query_embedding = self.embedding_model.encode([query]).tolist()[0]
+            with stage_timer("retrieval", "embed"):
+                query_embeddings = await self.embedding_batcher.encode(queries)
             
-            where_clause = {"user_id": user_id}
-            if document_ids:
-                where_clause["document_id"] = {"$in": document_ids}
+            include = ["documents", "metadatas", "distances"]
+            n_results = k
+            if mmr_lambda is not None:
+                include.append("embeddings")
+                n_results = k * settings.RETRIEVAL_MMR_FETCH_FACTOR
             
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=k,
-                where=where_clause
-            )
+            # A section filter is already narrow; centroids can't see sections
+            if settings.RETRIEVAL_COARSE_DOCUMENTS and not document_ids and not section:
+                with stage_timer("retrieval", "coarse"):
+                    wheres = [
+                        self._build_where(user_id, candidate_ids)
+                        for candidate_ids in self._closest_documents(query_embeddings, user_id)
+                    ]
+            else:
+                wheres = [self._build_where(user_id, document_ids, section)] * len(queries)
+            
+            with stage_timer("retrieval", "query"):
+                results = self._query(query_embeddings, n_results, wheres, include)
             
-            documents = []
-            if results["documents"]:
-                for i, doc in enumerate(results["documents"][0]):
-                    metadata = results["metadatas"][0][i]
-                    distance = results["distances"][0][i]
-                    
-                    documents.append({
-                        "content": doc,
-                        "document_id": metadata["document_id"],
-                        "title": metadata["title"],
-                        "score": 1 - distance,  # Convert distance to similarity
-                        "chunk_index": metadata.get("chunk_index", 0)
-                    })
+            documents = [self._format_results(results, i) for i in range(len(queries))]
+            if mmr_lambda is None:
+                return documents
             
+            with stage_timer("retrieval", "rerank"):
+                from app.rag.diversity import max_marginal_relevance
+                
+                for i, candidates in enumerate(documents):
+                    selected = max_marginal_relevance(
+                        query_embeddings[i],
+                        results["embeddings"][i],
+                        k,
+                        mmr_lambda,
+                        settings.RETRIEVAL_DUPLICATE_THRESHOLD
+                    )
+                    documents[i] = [candidates[j] for j in selected]
             return documents
         except Exception as e:
             raise VectorStoreError(f"Error performing similarity search: {str(e)}")
     
+    def _closest_documents(self, query_embeddings: List[List[float]], user_id: int) -> List[List[int]]:
+        results = self.coarse_collection.query(
+            query_embeddings=query_embeddings,
+            n_results=settings.RETRIEVAL_COARSE_DOCUMENTS,
+            where={"user_id": user_id},
+            include=["metadatas"]
+        )
+        # An empty list (no centroids for this user yet) means an unfiltered search
+        return [
+            [metadata["document_id"] for metadata in metadatas]
+            for metadatas in results["metadatas"] or [[] for _ in query_embeddings]
+        ]
+    
+    def _query(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int,
+        wheres: List[Dict[str, Any]],
+        include: List[str]
+    ) -> Dict[str, Any]:
+        # A shared filter goes out as one multi-embedding query; otherwise one
+        # query per filter, merged into the same per-query result layout
+        if all(where == wheres[0] for where in wheres):
+            return self.collection.query(
+                query_embeddings=query_embeddings,
+                n_results=n_results,
+                where=wheres[0],
+                include=include
+            )
+        
+        merged: Dict[str, Any] = {key: [] for key in include}
+        for embedding, where in zip(query_embeddings, wheres):
+            result = self.collection.query(
+                query_embeddings=[embedding],
+                n_results=n_results,
+                where=where,
+                include=include
+            )
+            for key in include:
+                merged[key].append(result[key][0])
+        return merged
+    
+    def _format_results(self, results: Dict[str, Any], query_index: int) -> List[Dict[str, Any]]:
+        documents = []
+        if not results["documents"]:
+            return documents
+        
+        for i, doc in enumerate(results["documents"][query_index]):
+            metadata = results["metadatas"][query_index][i]
+            distance = results["distances"][query_index][i]
+            
+            documents.append({
+                "content": doc,
+                "document_id": metadata["document_id"],
+                "title": metadata["title"],
+                "score": 1 - distance,  # Convert distance to similarity
+                "chunk_index": metadata.get("chunk_index", 0),
+                "section": metadata.get("section", "")
+            })
+        
+        return documents
+    
+    async def get_document_chunks(self, document_id: int, user_id: int) -> Dict[str, Any]:
+        try:
+            results = self.collection.get(
+                where=self._build_where(user_id, [document_id]),
+                include=["documents", "embeddings", "metadatas"]
+            )
+            
+            # Chroma returns records in storage order; restore reading order
+            order = sorted(
+                range(len(results["ids"])),
+                key=lambda i: results["metadatas"][i].get("chunk_index", 0)
+            )
+            return {
+                "ids": [results["ids"][i] for i in order],
+                "documents": [results["documents"][i] for i in order],
+                "embeddings": [results["embeddings"][i] for i in order],
+                "metadatas": [results["metadatas"][i] for i in order]
+            }
+        except Exception as e:
+            raise VectorStoreError(f"Error fetching document chunks: {str(e)}")
+    
     async def delete_user_documents(self, user_id: int) -> bool:
         try:
-            self.collection.delete(where={"user_id": user_id})
+            for collection in self._writable_collections():
+                collection.delete(where={"user_id": user_id})
+            return True
+        except Exception as e:
+            raise VectorStoreError(f"Error deleting user documents: {str(e)}")
+    
+    async def delete_document_vectors(self, document_ids: List[int]) -> bool:
+        try:
+            batch_size = settings.VECTOR_DELETE_BATCH_SIZE
+            for start in range(0, len(document_ids), batch_size):
+                where = {"document_id": {"$in": document_ids[start:start + batch_size]}}
+                for collection in self._writable_collections():
+                    collection.delete(where=where)
             return True
         except Exception as e:
-            raise VectorStoreError(f"Error deleting user documents: {str(e)}")
\ No newline at end of file
+            raise VectorStoreError(f"Error deleting document vectors: {str(e)}")
+    
+    def iter_ids(self, batch_size: int = 1000, collection=None) -> Iterator[List[str]]:
+        collection = collection or self.collection
+        offset = 0
+        while True:
+            batch = collection.get(include=[], limit=batch_size, offset=offset)["ids"]
+            if not batch:
+                return
+            yield batch
+            offset += len(batch)
+    
+    def delete_ids(self, ids: List[str], collection=None) -> int:
+        collection = collection or self.collection
+        try:
+            batch_size = self.client.get_max_batch_size()
+            for start in range(0, len(ids), batch_size):
+                collection.delete(ids=ids[start:start + batch_size])
+            return len(ids)
+        except Exception as e:
+            raise VectorStoreError(f"Error deleting vectors: {str(e)}")
+    
+    def _writable_collections(self) -> List[Any]:
+        # The active collections plus those of a running migration
+        index = read_active_index()
+        names = [index["collection"], index["coarse_collection"]]
+        if index.get("migration"):
+            names += [index["migration"]["collection"], index["migration"]["coarse_collection"]]
+        return [self.get_collection(name) for name in names]
+    
+    def _build_where(
+        self,
+        user_id: int,
+        document_ids: Optional[List[int]] = None,
+        section: Optional[str] = None
+    ) -> Dict[str, Any]:
+        # Chroma only accepts one field per filter unless combined with $and
+        conditions = [{"user_id": user_id}]
+        if document_ids:
+            conditions.append({"document_id": {"$in": document_ids}})
+        if section:
+            parts = [part.strip() for part in section.split(SECTION_SEPARATOR)]
+            prefix = SECTION_SEPARATOR.join(parts)
+            # Vectors written before section prefixes were stored only match exactly
+            conditions.append({"$or": [
+                {f"section_{len(parts)}": prefix},
+                {"section": prefix}
+            ]})
+        if len(conditions) == 1:
+            return conditions[0]
+        return {"$and": conditions}
+    
+    @staticmethod
+    def vector_id(user_id: int, document_id: int, chunk_index: int) -> str:
+        return f"user_{user_id}_doc_{document_id}_chunk_{chunk_index}"
+    
+    @staticmethod
+    def document_vector_id(user_id: int, document_id: int) -> str:
+        return f"user_{user_id}_doc_{document_id}"
\ No newline at end of file
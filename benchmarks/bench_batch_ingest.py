@@ -0,0 +1,78 @@
+"""Compare batch ingestion against the same files ingested one by one.
+
+Run with ``python -m benchmarks.bench_batch_ingest --documents 20``. Ingest
+only builds extractive summaries, so no LLM is needed; leave
+SUMMARY_BACKGROUND_REFINE off so refinement doesn't run during the timings.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+WORK_DIR = tempfile.mkdtemp(prefix="bench_ingest_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{WORK_DIR}/bench.db")
+os.environ.setdefault("CHROMA_PERSIST_DIRECTORY", f"{WORK_DIR}/chroma")
+os.environ.setdefault("UPLOAD_DIR", f"{WORK_DIR}/uploads")
+os.environ.setdefault("LLM_WARMUP", "false")
+
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import chat, document, study_session, user  # noqa: E402,F401
+from app.models.document import Document  # noqa: E402
+from app.services.document_service import DocumentService  # noqa: E402
+from benchmarks.corpus import write_corpus  # noqa: E402
+
+
+def create_documents(db, paths, owner_id: int):
+    documents = []
+    for path in paths:
+        documents.append(Document(
+            title=path.name,
+            filename=path.name,
+            file_path=str(path),
+            file_type=path.suffix,
+            file_size=path.stat().st_size,
+            owner_id=owner_id,
+            processing_status="pending"
+        ))
+    db.add_all(documents)
+    db.commit()
+    return [doc.id for doc in documents]
+
+
+async def run(documents: int, words: int):
+    Base.metadata.create_all(bind=engine)
+    service = DocumentService()
+
+    paths = write_corpus(Path(WORK_DIR) / "corpus", documents, words)
+    db = SessionLocal()
+    try:
+        # Warm up the embedding model and process pool outside the timings
+        await service.process_documents(create_documents(db, paths[:1], owner_id=0), db)
+
+        single_ids = create_documents(db, paths, owner_id=1)
+        start = time.perf_counter()
+        for document_id in single_ids:
+            await service.process_document(document_id, db)
+        single_seconds = time.perf_counter() - start
+
+        batch_ids = create_documents(db, paths, owner_id=2)
+        start = time.perf_counter()
+        await service.process_documents(batch_ids, db)
+        batch_seconds = time.perf_counter() - start
+    finally:
+        db.close()
+
+    print(f"documents:        {documents} x ~{words} words")
+    print(f"single uploads:   {single_seconds:.2f}s ({documents / single_seconds:.2f} docs/s)")
+    print(f"batch upload:     {batch_seconds:.2f}s ({documents / batch_seconds:.2f} docs/s)")
+    print(f"speedup:          {single_seconds / batch_seconds:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--words", type=int, default=3000)
+    args = parser.parse_args()
+    asyncio.run(run(args.documents, args.words))
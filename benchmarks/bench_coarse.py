@@ -0,0 +1,102 @@
+"""Two-stage (document centroid, then chunks) retrieval against flat search.
+
+Builds topical corpora of growing size, each under its own user, and runs the
+same queries flat and with the coarse pre-filter. Reports latency and the
+recall@k of two-stage results relative to flat search.
+
+    python -m benchmarks.bench_coarse --sizes 50 200 500 --top-documents 5
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+WORK_DIR = tempfile.mkdtemp(prefix="bench_coarse_")
+os.environ.setdefault("CHROMA_PERSIST_DIRECTORY", f"{WORK_DIR}/chroma")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{WORK_DIR}/bench.db")
+
+from app.core.config import settings  # noqa: E402
+from app.rag.chunking import TextChunker  # noqa: E402
+from app.services.vector_store_service import VectorStoreService  # noqa: E402
+from benchmarks.corpus import WORDS  # noqa: E402
+from benchmarks.harness import percentile  # noqa: E402
+
+
+def topical_text(rng: random.Random, topic, words: int) -> str:
+    sentences = [
+        " ".join(rng.choice(topic) for _ in range(12)).capitalize() + "."
+        for _ in range(max(words // 12, 1))
+    ]
+    return " ".join(sentences)
+
+
+async def build_corpus(store, chunker, rng, user_id: int, documents: int, words: int):
+    topics = []
+    for document_id in range(documents):
+        topic = rng.sample(WORDS, 6)
+        topics.append(topic)
+        chunks = chunker.chunk_text(topical_text(rng, topic, words), document_id)
+        await store.add_documents([
+            {
+                "content": chunk["text"],
+                "document_id": document_id,
+                "title": f"notes_{document_id}",
+                "chunk_index": chunk["chunk_index"]
+            }
+            for chunk in chunks
+        ], user_id=user_id)
+    return topics
+
+
+async def search(store, queries, user_id: int, k: int, top_documents: int):
+    settings.RETRIEVAL_COARSE_DOCUMENTS = top_documents
+    latencies = []
+    results = []
+    for query in queries:
+        started = time.perf_counter()
+        found = await store.similarity_search(query, user_id=user_id, k=k)
+        latencies.append(time.perf_counter() - started)
+        results.append({(result["document_id"], result["chunk_index"]) for result in found})
+    return latencies, results
+
+
+async def run(sizes, words: int, queries: int, k: int, top_documents: int):
+    store = VectorStoreService()
+    chunker = TextChunker()
+    rng = random.Random(0)
+
+    print(f"{'documents':>10}{'flat p50':>10}{'flat p95':>10}{'2-stage p50':>13}{'2-stage p95':>13}{'recall@k':>10}")
+    for user_id, size in enumerate(sizes, start=1):
+        topics = await build_corpus(store, chunker, rng, user_id, size, words)
+        query_texts = []
+        for _ in range(queries):
+            first, second = rng.sample(rng.choice(topics), 2)
+            query_texts.append(f"What is the relationship between {first} and {second}?")
+
+        await search(store, query_texts[:1], user_id, k, 0)
+        flat_latencies, flat_results = await search(store, query_texts, user_id, k, 0)
+        coarse_latencies, coarse_results = await search(store, query_texts, user_id, k, top_documents)
+
+        recall = sum(
+            len(coarse & flat) / max(len(flat), 1)
+            for coarse, flat in zip(coarse_results, flat_results)
+        ) / len(query_texts)
+        print(
+            f"{size:>10}"
+            f"{percentile(flat_latencies, 50) * 1000:>10.2f}{percentile(flat_latencies, 95) * 1000:>10.2f}"
+            f"{percentile(coarse_latencies, 50) * 1000:>13.2f}{percentile(coarse_latencies, 95) * 1000:>13.2f}"
+            f"{recall:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--words", type=int, default=1500)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--top-documents", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.words, args.queries, args.k, args.top_documents))
@@ -0,0 +1,89 @@
+"""Compare the PyTorch and ONNX Runtime embedding backends on the same corpus.
+
+Measures batch encoding throughput, single-query latency and retrieval recall@k
+of each ONNX variant against the PyTorch results on the same chunks.
+
+    python -m benchmarks.bench_embeddings --chunks 2000 --threads 4
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+WORK_DIR = tempfile.mkdtemp(prefix="bench_embeddings_")
+os.environ.setdefault("ONNX_MODEL_DIR", f"{WORK_DIR}/onnx_models")
+
+import numpy as np  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.rag.embeddings import load_embedding_model  # noqa: E402
+from benchmarks.corpus import make_queries, make_text  # noqa: E402
+from benchmarks.harness import BenchmarkReport, print_report  # noqa: E402
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def top_k(query_embeddings, chunk_embeddings, k: int):
+    scores = query_embeddings @ chunk_embeddings.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def run(chunks: int, queries: int, k: int, threads: int, batch_size: int):
+    rng = random.Random(0)
+    texts = [make_text(rng, 150) for _ in range(chunks)]
+    query_texts = make_queries(queries)
+
+    report = BenchmarkReport("embeddings", {
+        "model": settings.EMBEDDING_MODEL,
+        "chunks": chunks,
+        "queries": queries,
+        "k": k,
+        "threads": threads,
+        "batch_size": batch_size
+    })
+    variants = [("torch", "torch", False), ("onnx", "onnx", False), ("onnx_int8", "onnx", True)]
+
+    reference = None
+    recall = {}
+    for name, backend, quantize in variants:
+        started = time.perf_counter()
+        model = load_embedding_model(settings.EMBEDDING_MODEL, backend, quantize=quantize, threads=threads)
+        report.extra[f"{name}_load_seconds"] = round(time.perf_counter() - started, 3)
+        model.encode(["warmup"])
+
+        batch_stage = report.stage(f"{name}_batch")
+        with batch_stage.measure(items=len(texts)):
+            chunk_embeddings = np.asarray(model.encode(texts, batch_size=batch_size), dtype=np.float32)
+
+        query_stage = report.stage(f"{name}_query")
+        query_embeddings = []
+        for query in query_texts:
+            with query_stage.measure():
+                query_embeddings.append(model.encode([query])[0])
+
+        results = top_k(np.asarray(query_embeddings, dtype=np.float32), chunk_embeddings, k)
+        if reference is None:
+            reference = results
+        recall[name] = round(float(np.mean([
+            len(set(found) & set(expected)) / k
+            for found, expected in zip(results, reference)
+        ])), 4)
+
+    report.extra["recall_at_k_vs_torch"] = recall
+    data = report.save(RESULTS_DIR / f"embeddings-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    print_report(data)
+    for name, value in recall.items():
+        print(f"recall@{k} {name:<12}{value:.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+    run(args.chunks, args.queries, args.k, args.threads, args.batch_size)
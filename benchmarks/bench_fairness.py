@@ -0,0 +1,119 @@
+"""Tail latency of light users while one heavy user floods the LLM.
+
+Light users send short chat generations at a steady rate; heavy users keep
+several long generations in flight at all times. The same load runs against
+a FIFO queue, the fair scheduler, and the fair scheduler behind the
+per-user token bucket (rejected clients wait out Retry-After). Reports p50/p99
+latency per user class and the number of rejected requests. Uses the fake LLM
+backend, so no model server is needed.
+
+    python -m benchmarks.bench_fairness --light-users 8 --heavy-users 1 --seconds 10
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import time
+
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("LLM_MAX_CONCURRENCY", "2")
+os.environ.setdefault("FAKE_LLM_LATENCY_SECONDS", "0.02")
+os.environ.setdefault("FAKE_LLM_TOKENS_PER_SECOND", "4000")
+os.environ.setdefault("FAKE_LLM_REPLY_TOKENS", "2000")
+# Generations run ~50x faster than on a real model, so refill the buckets faster too
+os.environ.setdefault("RATE_LIMIT_REFILL_PER_SECOND", "50")
+
+from app.services.llm_gateway import FairScheduler, get_llm_gateway  # noqa: E402
+from app.services.rate_limiter import RateLimiter  # noqa: E402
+from benchmarks.harness import percentile  # noqa: E402
+
+LIGHT_TOKENS = 100
+HEAVY_TOKENS = 1500
+
+
+class FifoScheduler(FairScheduler):
+    # One shared queue: every request ahead of yours is served first
+    async def acquire(self, user_key, cost: float = 1.0):
+        await super().acquire(None, 1.0)
+
+
+async def request(gateway, limiter, user_id: int, endpoint: str, tokens: int, prompt: str, stats):
+    started = time.perf_counter()
+    if limiter is not None:
+        while True:
+            retry_after = await limiter.check(user_id, endpoint)
+            if not retry_after:
+                break
+            stats["rejected"] += 1
+            await asyncio.sleep(retry_after)
+    await gateway.chat(
+        [{"role": "user", "content": prompt}],
+        user_id=user_id,
+        task="chat",
+        options={"num_predict": tokens}
+    )
+    stats["latencies"].append(time.perf_counter() - started)
+
+
+async def light_user(gateway, limiter, user_id, deadline, interval, counter, stats):
+    rng = random.Random(user_id)
+    while time.perf_counter() < deadline:
+        await request(gateway, limiter, user_id, "chat", LIGHT_TOKENS, f"light {next(counter)}", stats)
+        await asyncio.sleep(rng.expovariate(1 / interval))
+
+
+async def heavy_stream(gateway, limiter, user_id, deadline, counter, stats):
+    while time.perf_counter() < deadline:
+        await request(gateway, limiter, user_id, "quiz", HEAVY_TOKENS, f"heavy {next(counter)}", stats)
+
+
+async def run_mode(scheduler, limiter, args):
+    gateway = get_llm_gateway()
+    gateway.scheduler = scheduler
+    counter = itertools.count()
+    light = {"latencies": [], "rejected": 0}
+    heavy = {"latencies": [], "rejected": 0}
+    deadline = time.perf_counter() + args.seconds
+
+    tasks = [
+        light_user(gateway, limiter, user_id, deadline, args.interval, counter, light)
+        for user_id in range(1, args.light_users + 1)
+    ]
+    for user_id in range(1000, 1000 + args.heavy_users):
+        tasks.extend(
+            heavy_stream(gateway, limiter, user_id, deadline, counter, heavy)
+            for _ in range(args.heavy_concurrency)
+        )
+    await asyncio.gather(*tasks)
+    return light, heavy
+
+
+def main(args):
+    modes = {
+        "fifo": lambda: (FifoScheduler(args.concurrency), None),
+        "fair": lambda: (FairScheduler(args.concurrency), None),
+        "fair + rate limit": lambda: (FairScheduler(args.concurrency), RateLimiter())
+    }
+    print(f"{'mode':<19}{'class':<7}{'requests':>9}{'p50 ms':>9}{'p99 ms':>9}{'rejected':>10}")
+    for name, build in modes.items():
+        scheduler, limiter = build()
+        light, heavy = asyncio.run(run_mode(scheduler, limiter, args))
+        for label, stats in (("light", light), ("heavy", heavy)):
+            latencies = stats["latencies"]
+            print(
+                f"{name:<19}{label:<7}{len(latencies):>9}"
+                f"{percentile(latencies, 50) * 1000:>9.1f}{percentile(latencies, 99) * 1000:>9.1f}"
+                f"{stats['rejected']:>10}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--light-users", type=int, default=8)
+    parser.add_argument("--heavy-users", type=int, default=1)
+    parser.add_argument("--heavy-concurrency", type=int, default=8)
+    parser.add_argument("--interval", type=float, default=0.5, help="mean think time of light users")
+    parser.add_argument("--concurrency", type=int, default=2, help="generation slots")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    main(parser.parse_args())
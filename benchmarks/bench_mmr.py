@@ -0,0 +1,90 @@
+"""Cost and benefit of MMR retrieval against plain top-k.
+
+Indexes a synthetic corpus with the regular chunker (so neighbouring chunks
+overlap), then runs the same queries with plain similarity search and with MMR
+at several lambdas. Reports retrieval latency, and the prompt tokens spent on
+text repeated across the returned chunks.
+
+    python -m benchmarks.bench_mmr --documents 20 --queries 100 --k 5
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import tempfile
+import time
+
+WORK_DIR = tempfile.mkdtemp(prefix="bench_mmr_")
+os.environ.setdefault("CHROMA_PERSIST_DIRECTORY", f"{WORK_DIR}/chroma")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{WORK_DIR}/bench.db")
+
+from app.rag.chunking import TextChunker  # noqa: E402
+from app.services.chat_history_service import estimate_tokens  # noqa: E402
+from app.services.vector_store_service import VectorStoreService  # noqa: E402
+from benchmarks.corpus import make_queries, make_text  # noqa: E402
+from benchmarks.harness import percentile  # noqa: E402
+
+
+def redundant_tokens(results) -> int:
+    # Tokens of sentences already sent in an earlier chunk of the same prompt
+    seen = set()
+    wasted = 0
+    for result in results:
+        for sentence in re.split(r"(?<=[.!?])\s+", result["content"]):
+            if sentence in seen:
+                wasted += estimate_tokens(sentence)
+            seen.add(sentence)
+    return wasted
+
+
+async def run(documents: int, words: int, queries: int, k: int, lambdas):
+    store = VectorStoreService()
+    chunker = TextChunker()
+    rng = random.Random(0)
+    for document_id in range(1, documents + 1):
+        chunks = chunker.chunk_text(make_text(rng, words), document_id)
+        await store.add_documents([
+            {
+                "content": chunk["text"],
+                "document_id": document_id,
+                "title": f"notes_{document_id}",
+                "chunk_index": chunk["chunk_index"]
+            }
+            for chunk in chunks
+        ], user_id=1)
+
+    query_texts = make_queries(queries)
+    await store.similarity_search(query_texts[0], user_id=1, k=k)
+
+    print(f"{'mode':<14}{'p50 ms':>10}{'p95 ms':>10}{'tokens':>10}{'redundant':>12}{'docs/query':>12}")
+    for mmr_lambda in [None] + lambdas:
+        latencies = []
+        tokens = 0
+        wasted = 0
+        distinct_documents = 0
+        for query in query_texts:
+            started = time.perf_counter()
+            results = await store.similarity_search(query, user_id=1, k=k, mmr_lambda=mmr_lambda)
+            latencies.append(time.perf_counter() - started)
+
+            tokens += sum(estimate_tokens(result["content"]) for result in results)
+            wasted += redundant_tokens(results)
+            distinct_documents += len({result["document_id"] for result in results})
+
+        mode = "top-k" if mmr_lambda is None else f"mmr {mmr_lambda}"
+        print(
+            f"{mode:<14}{percentile(latencies, 50) * 1000:>10.2f}{percentile(latencies, 95) * 1000:>10.2f}"
+            f"{tokens / queries:>10.0f}{wasted / queries:>12.0f}{distinct_documents / queries:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--words", type=int, default=3000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--lambdas", type=float, nargs="+", default=[0.9, 0.7, 0.5])
+    args = parser.parse_args()
+    asyncio.run(run(args.documents, args.words, args.queries, args.k, args.lambdas))
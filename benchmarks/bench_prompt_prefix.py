@@ -0,0 +1,80 @@
+"""Measure prefill time saved by the stable-prefix chat prompt layout.
+
+Replays the same multi-turn conversation against a running Ollama server twice:
+once with the retrieved context inside the system message (the old layout) and
+once with the current layout, where the context travels with the latest user
+turn. Ollama reports ``prompt_eval_count`` and ``prompt_eval_duration`` for the
+tokens it actually had to prefill, so a reused prefix shows up directly.
+
+Run with ``python -m benchmarks.bench_prompt_prefix --turns 6``.
+"""
+import argparse
+import asyncio
+import random
+
+from ollama import AsyncClient  # type: ignore
+
+from app.core.config import settings
+from app.services.llm_service import CHAT_SYSTEM_PROMPT
+
+TOPICS = ["photosynthesis", "cell respiration", "mitosis", "enzymes", "osmosis", "DNA replication"]
+
+
+def fake_context(rng: random.Random, sentences: int = 40) -> str:
+    words = " ".join(rng.choice(TOPICS) for _ in range(12))
+    return "\n---\n".join(
+        f"Source: notes_{i}.pdf\nContent: {words.capitalize()}." for i in range(sentences // 4)
+    )
+
+
+def old_layout(history, context, query):
+    system_prompt = CHAT_SYSTEM_PROMPT + f"\n\nContext from study materials:\n{context}"
+    return [{"role": "system", "content": system_prompt}, *history, {"role": "user", "content": query}]
+
+
+def new_layout(history, context, query):
+    query = f"Context from study materials:\n{context}\n\nQuestion: {query}"
+    return [{"role": "system", "content": CHAT_SYSTEM_PROMPT}, *history, {"role": "user", "content": query}]
+
+
+async def replay(client: AsyncClient, build, turns: int, seed: int):
+    rng = random.Random(seed)
+    history = []
+    prefill_ms = 0.0
+    prefill_tokens = 0
+
+    for turn in range(turns):
+        query = f"Question {turn}: explain {rng.choice(TOPICS)} briefly."
+        response = await client.chat(
+            model=settings.LLM_MODEL,
+            messages=build(history, fake_context(rng), query),
+            keep_alive=settings.LLM_KEEP_ALIVE,
+            options={"num_ctx": settings.LLM_CHAT_NUM_CTX, "num_predict": 32, "temperature": 0}
+        )
+        prefill_ms += response["prompt_eval_duration"] / 1e6
+        prefill_tokens += response["prompt_eval_count"]
+
+        history.append({"role": "user", "content": query})
+        history.append({"role": "assistant", "content": response["message"]["content"]})
+
+    return prefill_ms, prefill_tokens
+
+
+async def run(turns: int):
+    client = AsyncClient(host=settings.OLLAMA_HOST)
+    await client.chat(model=settings.LLM_MODEL, messages=[], keep_alive=settings.LLM_KEEP_ALIVE)
+
+    old_ms, old_tokens = await replay(client, old_layout, turns, seed=1)
+    new_ms, new_tokens = await replay(client, new_layout, turns, seed=1)
+
+    print(f"turns:            {turns}")
+    print(f"context-in-system: {old_ms:8.1f} ms prefill, {old_tokens} tokens evaluated")
+    print(f"stable prefix:     {new_ms:8.1f} ms prefill, {new_tokens} tokens evaluated")
+    print(f"prefill saved:     {old_ms - new_ms:8.1f} ms ({(1 - new_ms / old_ms) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=6)
+    args = parser.parse_args()
+    asyncio.run(run(args.turns))
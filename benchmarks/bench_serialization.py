@@ -0,0 +1,92 @@
+"""Serialization CPU and bytes on the wire for large chat transcripts.
+
+Builds ChatSessionResponse payloads with sourced assistant turns and compares
+the stdlib JSON path (FastAPI's JSONResponse), ORJSONResponse and the
+conditional-GET path, then the size and CPU cost of gzip and zstd on the result.
+
+    python -m benchmarks.bench_serialization --messages 50 200 1000
+"""
+import argparse
+import json
+import random
+import time
+import zlib
+from datetime import datetime, timezone
+
+import orjson # type: ignore
+from fastapi.encoders import jsonable_encoder # type: ignore
+from fastapi.responses import ORJSONResponse # type: ignore
+from starlette.responses import JSONResponse # type: ignore
+
+from app.api.conditional import _adapter
+from app.api.schemas.chat import ChatSessionResponse
+from app.core.compression import zstandard
+from benchmarks.corpus import make_text
+
+
+def make_session(rng: random.Random, messages: int) -> ChatSessionResponse:
+    now = datetime.now(timezone.utc)
+    turns = []
+    for i in range(messages):
+        assistant = i % 2 == 1
+        turns.append({
+            "id": i + 1,
+            "role": "assistant" if assistant else "user",
+            "content": make_text(rng, 180 if assistant else 20),
+            "timestamp": now,
+            "sources": [
+                {
+                    "document_id": rng.randrange(50),
+                    "title": f"notes_{rng.randrange(50)}.pdf",
+                    "relevance_score": rng.random(),
+                    "chunk_text": make_text(rng, 40)[:200] + "..."
+                }
+                for _ in range(4)
+            ] if assistant else None
+        })
+    return ChatSessionResponse.model_validate({
+        "id": 1, "user_id": 1, "title": "Revision", "created_at": now, "messages": turns
+    })
+
+
+def cpu_time(fn, repeat: int):
+    started = time.process_time()
+    for _ in range(repeat):
+        result = fn()
+    return (time.process_time() - started) / repeat, result
+
+
+def run(sizes, repeat: int):
+    rng = random.Random(0)
+    adapter = _adapter(ChatSessionResponse)
+    encoders = {
+        "json": lambda session: JSONResponse(jsonable_encoder(session)).body,
+        "orjson": lambda session: ORJSONResponse(jsonable_encoder(session)).body,
+        "orjson (etag path)": lambda session: orjson.dumps(adapter.dump_python(session))
+    }
+    compressors = {"gzip-6": lambda body: zlib.compress(body, 6, 31)}
+    if zstandard is not None:
+        compressor = zstandard.ZstdCompressor(level=3)
+        compressors["zstd-3"] = compressor.compress
+
+    print(f"{'messages':>9}  {'encoder':<20}{'cpu ms':>9}{'bytes':>11}")
+    for messages in sizes:
+        session = make_session(rng, messages)
+        body = b""
+        for name, encode in encoders.items():
+            seconds, body = cpu_time(lambda: encode(session), repeat)
+            print(f"{messages:>9}  {name:<20}{seconds * 1000:>9.2f}{len(body):>11,}")
+        for name, compress in compressors.items():
+            seconds, compressed = cpu_time(lambda: compress(body), repeat)
+            ratio = len(body) / max(len(compressed), 1)
+            print(f"{messages:>9}  {'+ ' + name:<20}{seconds * 1000:>9.2f}{len(compressed):>11,}  ({ratio:.1f}x)")
+        # Same document either way; guards against the encoders drifting apart
+        assert json.loads(body) == json.loads(encoders["json"](session))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run(args.messages, args.repeat)
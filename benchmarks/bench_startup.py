@@ -0,0 +1,70 @@
+"""Cold-start time of an API worker, broken down by import.
+
+Runs ``python -X importtime`` in a fresh interpreter for the chosen module and
+reports total wall time plus the slowest top-level packages by cumulative
+import time.
+
+    python -m benchmarks.bench_startup                        # import app.main
+    python -m benchmarks.bench_startup --module app.api.routes.endpoints.auth
+    python -m benchmarks.bench_startup --preload              # include model preload
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+
+def import_times(module: str, preload: bool):
+    code = f"import {module}"
+    if preload:
+        code += "; from app.services.vector_store_service import VectorStoreService; VectorStoreService().warmup()"
+
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+        env={**os.environ, "LLM_WARMUP": "false"}
+    )
+    wall_seconds = time.perf_counter() - started
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr[-2000:])
+        sys.exit(result.returncode)
+
+    # Lines look like "import time:       123 |       4567 |   package.module"
+    by_package = defaultdict(int)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Only top-level imports; nested ones are already in their parent's cumulative time
+        depth = len(name) - len(name.lstrip())
+        if depth == 1:
+            by_package[name.strip().split(".")[0]] += int(cumulative)
+
+    return wall_seconds, by_package
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--preload", action="store_true")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    wall_seconds, by_package = import_times(args.module, args.preload)
+
+    print(f"{args.module}{' + preload' if args.preload else ''}: {wall_seconds:.3f}s wall")
+    print(f"{'package':<32}{'cumulative ms':>14}")
+    for package, micros in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<32}{micros / 1000:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import random
+from pathlib import Path
+from typing import List
+
+WORDS = (
+    "cell membrane protein enzyme energy gradient transport diffusion osmosis "
+    "mitochondria nucleus ribosome synthesis replication theorem integral "
+    "derivative vector matrix eigenvalue history empire treaty revolution "
+    "photosynthesis chlorophyll respiration glucose oxygen carbon nitrogen "
+    "velocity acceleration momentum force gravity friction circuit voltage"
+).split()
+
+
+def make_sentence(rng: random.Random, length: int = 12) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(length)).capitalize() + "."
+
+
+def make_text(rng: random.Random, words: int) -> str:
+    sentences = [make_sentence(rng) for _ in range(max(words // 12, 1))]
+    # Paragraph breaks every few sentences, like real notes
+    paragraphs = [" ".join(sentences[i:i + 5]) for i in range(0, len(sentences), 5)]
+    return "\n\n".join(paragraphs)
+
+
+def write_corpus(
+    directory: Path,
+    documents: int,
+    words_per_document: int,
+    seed: int = 0,
+    suffix: str = ".txt"
+) -> List[Path]:
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(documents):
+        path = directory / f"notes_{i}{suffix}"
+        path.write_text(make_text(rng, words_per_document), encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def make_queries(count: int, seed: int = 1) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        f"What is the relationship between {rng.choice(WORDS)} and {rng.choice(WORDS)}?"
+        for _ in range(count)
+    ]
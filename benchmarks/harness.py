@@ -0,0 +1,120 @@
+import json
+import platform
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class Stage:
+    def __init__(self, name: str):
+        self.name = name
+        self.samples: List[float] = []
+        self.items = 0
+        self.wall_seconds = 0.0
+
+    @contextmanager
+    def measure(self, items: int = 1):
+        started = time.perf_counter()
+        yield
+        self.samples.append(time.perf_counter() - started)
+        self.items += items
+
+    def summary(self) -> Dict[str, Any]:
+        total = self.wall_seconds or sum(self.samples)
+        return {
+            "count": len(self.samples),
+            "items": self.items,
+            "p50_ms": round(percentile(self.samples, 50) * 1000, 3),
+            "p95_ms": round(percentile(self.samples, 95) * 1000, 3),
+            "p99_ms": round(percentile(self.samples, 99) * 1000, 3),
+            "throughput_per_sec": round(self.items / total, 3) if total else 0.0
+        }
+
+
+class BenchmarkReport:
+    def __init__(self, name: str, params: Dict[str, Any]):
+        self.name = name
+        self.params = params
+        self.stages: Dict[str, Stage] = {}
+        self.extra: Dict[str, Any] = {}
+
+    def stage(self, name: str) -> Stage:
+        return self.stages.setdefault(name, Stage(name))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "params": self.params,
+            "stages": {name: stage.summary() for name, stage in self.stages.items()},
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            **self.extra
+        }
+
+    def save(self, path: Path) -> Dict[str, Any]:
+        data = self.to_dict()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        return data
+
+
+def compare_to_baseline(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = 0.10
+) -> List[str]:
+    # A stage regresses when p95 latency grows or throughput drops past the tolerance
+    regressions = []
+    for name, stage in current["stages"].items():
+        before = baseline.get("stages", {}).get(name)
+        if not before:
+            continue
+
+        if before["p95_ms"] and stage["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {before['p95_ms']:.2f}ms -> {stage['p95_ms']:.2f}ms"
+            )
+        if before["throughput_per_sec"] and stage["throughput_per_sec"] < before["throughput_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {before['throughput_per_sec']:.2f}/s -> {stage['throughput_per_sec']:.2f}/s"
+            )
+
+    for key in ("startup_seconds", "peak_rss_mb"):
+        before: Optional[float] = baseline.get(key)
+        if before and current.get(key, 0) > before * (1 + tolerance):
+            regressions.append(f"{key}: {before} -> {current[key]}")
+
+    return regressions
+
+
+def print_report(data: Dict[str, Any]):
+    print(f"{'stage':<20}{'count':>8}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}{'items/s':>12}")
+    for name, stage in data["stages"].items():
+        print(
+            f"{name:<20}{stage['count']:>8}{stage['p50_ms']:>12.2f}{stage['p95_ms']:>12.2f}"
+            f"{stage['p99_ms']:>12.2f}{stage['throughput_per_sec']:>12.2f}"
+        )
+    if "startup_seconds" in data:
+        print(f"startup: {data['startup_seconds']:.2f}s")
+    print(f"peak RSS: {data['peak_rss_mb']:.1f} MB")
@@ -0,0 +1,154 @@
+"""End-to-end RAG benchmark on a synthetic corpus.
+
+Drives extraction, chunking, vector store ingestion, similarity search and
+RAGService.generate_response (against the deterministic fake LLM backend), and
+reports p50/p95/p99 latency, throughput, peak RSS and API startup time.
+
+    python -m benchmarks.run_rag --documents 50 --words 2000 --queries 200
+    python -m benchmarks.run_rag --save-baseline          # record a baseline
+    python -m benchmarks.run_rag --baseline benchmarks/baseline.json
+
+Results are written as JSON under benchmarks/results/. When a baseline is
+given, stages whose p95 latency or throughput regress beyond --tolerance are
+listed and the process exits non-zero.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+WORK_DIR = tempfile.mkdtemp(prefix="bench_rag_")
+BENCH_ENV = {
+    "DATABASE_URL": f"sqlite:///{WORK_DIR}/bench.db",
+    "CHROMA_PERSIST_DIRECTORY": f"{WORK_DIR}/chroma",
+    "UPLOAD_DIR": f"{WORK_DIR}/uploads",
+    "LLM_BACKEND": "fake",
+    "LLM_WARMUP": "false",
+    "VECTOR_GC_INTERVAL_SECONDS": "0"
+}
+for key, value in BENCH_ENV.items():
+    os.environ.setdefault(key, value)
+
+from benchmarks.corpus import make_queries, write_corpus  # noqa: E402
+from benchmarks.harness import BenchmarkReport, compare_to_baseline, print_report  # noqa: E402
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+
+
+def measure_startup() -> float:
+    # Fresh interpreter so import and model loading costs aren't already paid
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", "import app.main"],
+        check=True,
+        env={**os.environ},
+        cwd=Path(__file__).parent.parent
+    )
+    return time.perf_counter() - started
+
+
+async def run(args) -> dict:
+    report = BenchmarkReport("rag", vars(args).copy())
+    report.extra["startup_seconds"] = round(measure_startup(), 3)
+
+    from app.rag.chunking import TextChunker
+    from app.rag.document_processor import DocumentProcessor
+    from app.services.rag_service import RAGService
+
+    processor = DocumentProcessor()
+    chunker = TextChunker()
+    rag_service = RAGService()
+    vector_store = rag_service.vector_store
+    user_id = 1
+
+    paths = write_corpus(Path(WORK_DIR) / "corpus", args.documents, args.words, seed=args.seed)
+
+    chunked = []
+    for document_id, path in enumerate(paths, start=1):
+        with report.stage("extract").measure():
+            text = processor.extract_text(str(path), path.suffix)
+
+        with report.stage("chunk").measure():
+            chunks = chunker.chunk_text(text, document_id)
+        chunked.append((document_id, path, chunks))
+
+    for document_id, path, chunks in chunked:
+        vector_docs = [
+            {
+                "content": chunk["text"],
+                "document_id": document_id,
+                "title": path.name,
+                "chunk_index": chunk["chunk_index"]
+            }
+            for chunk in chunks
+        ]
+        with report.stage("embed_store").measure(items=len(vector_docs)):
+            await vector_store.add_documents(vector_docs, user_id)
+
+    queries = make_queries(args.queries, seed=args.seed + 1)
+
+    search = report.stage("similarity_search")
+    for query in queries:
+        with search.measure():
+            await vector_store.similarity_search(query, user_id, k=args.k)
+
+    # End-to-end responses with `concurrency` requests in flight
+    rag = report.stage("generate_response")
+    pending = iter(queries)
+
+    async def worker():
+        for query in pending:
+            with rag.measure():
+                await rag_service.generate_response(query, user_id, max_sources=args.k)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    rag.wall_seconds = time.perf_counter() - started
+
+    return report.save(RESULTS_DIR / f"rag-{time.strftime('%Y%m%d-%H%M%S')}.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--words", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", type=Path, default=None)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    baseline_path = args.baseline
+    save_baseline = args.save_baseline
+    del args.baseline, args.save_baseline
+
+    data = asyncio.run(run(args))
+    print_report(data)
+
+    if save_baseline:
+        DEFAULT_BASELINE.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        print(f"baseline saved to {DEFAULT_BASELINE}")
+
+    if baseline_path:
+        regressions = compare_to_baseline(
+            data,
+            json.loads(baseline_path.read_text(encoding="utf-8")),
+            args.tolerance
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()